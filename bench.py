@@ -0,0 +1,103 @@
+"""
+Load tests and micro-benchmarks; every report is JSON so runs can be compared.
+
+    python bench.py load                                   # seed BENCH_DATABASE_URL, boot run:App, drive every flow
+    python bench.py load --flows login,get_user --concurrency 50 --requests 2000
+    python bench.py load --base-url http://127.0.0.1:8000  # against a server that is already running
+    python bench.py micro                                  # token encode/decode and CreateUser validation
+    python bench.py startup                                # -X importtime breakdown of `import run`
+    python bench.py compare baseline.json current.json     # exit 1 when p95/RPS/per-op/import time regressed
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+
+def _write(report: dict, output: str = None) -> None:
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+async def _load(args) -> dict:
+    from benchmarks.load import FLOWS, boot_server, run_load, seed
+
+    flows = args.flows.split(",") if args.flows else list(FLOWS)
+    unknown = [name for name in flows if name not in FLOWS]
+    if unknown:
+        raise SystemExit(f"Unknown flows: {', '.join(unknown)}. Available: {', '.join(FLOWS)}")
+
+    ctx = await seed(args.users, args.departments)
+    if args.base_url:
+        return await run_load(args.base_url, ctx, flows, args.requests, args.concurrency, args.warmup)
+    with boot_server(args.port, args.workers) as base_url:
+        return await run_load(base_url, ctx, flows, args.requests, args.concurrency, args.warmup)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="ERP API benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("load", help="Seed the database and load-test the HTTP API")
+    load.add_argument("--users", type=int, default=1000, help="Users to seed")
+    load.add_argument("--departments", type=int, default=50, help="Departments to seed")
+    load.add_argument("--concurrency", type=int, default=20, help="Requests in flight per flow")
+    load.add_argument("--requests", type=int, default=500, help="Measured requests per flow")
+    load.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per flow before measuring")
+    load.add_argument("--flows", default=None, help="Comma-separated flows (default: all)")
+    load.add_argument("--base-url", default=None,
+                      help="Use a running server (on BENCH_DATABASE_URL) instead of booting run:App")
+    load.add_argument("--port", type=int, default=8765, help="Port of the booted server")
+    load.add_argument("--workers", type=int, default=1, help="Worker processes of the booted server")
+    load.add_argument("--output", default=None, help="Write the JSON report here instead of stdout")
+
+    micro = commands.add_parser("micro", help="Time token and validation hot paths in-process")
+    micro.add_argument("--repeat", type=int, default=5, help="Timing runs per case; the best one is reported")
+    micro.add_argument("--output", default=None, help="Write the JSON report here instead of stdout")
+
+    startup = commands.add_parser("startup", help="Time the app's imports in fresh interpreters")
+    startup.add_argument("--target", default="run", help="Module to import")
+    startup.add_argument("--repeat", type=int, default=5, help="Fresh interpreters; medians are reported")
+    startup.add_argument("--top", type=int, default=25, help="Slowest modules and packages to list")
+    startup.add_argument("--output", default=None, help="Write the JSON report here instead of stdout")
+
+    compare = commands.add_parser("compare", help="Compare two reports of the same kind")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=10.0, help="Allowed change in percent")
+
+    args = parser.parse_args()
+
+    if args.command == "load":
+        _write(asyncio.run(_load(args)), args.output)
+        return 0
+
+    if args.command == "micro":
+        from benchmarks.micro import run_micro
+        _write(run_micro(args.repeat), args.output)
+        return 0
+
+    if args.command == "startup":
+        from benchmarks.startup import run_startup
+        _write(run_startup(args.target, args.repeat, args.top), args.output)
+        return 0
+
+    from benchmarks.report import compare as compare_reports
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare_reports(baseline, current, args.threshold)
+    for regression in regressions:
+        print(regression)
+    if not regressions:
+        print(f"No regression above {args.threshold:g}%.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Load tests and micro-benchmarks, run through bench.py at the repository root."""
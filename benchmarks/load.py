@@ -0,0 +1,262 @@
+import asyncio
+import contextlib
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Iterator, List
+
+import asyncpg
+import httpx
+
+from benchmarks.report import ROOT, git_commit, summarize
+from tools import constant as const
+from tools.migrations import migrate
+from tools.token import create_access_token, get_password_hash
+
+# Every seeded or created row is named with this prefix and removed before the next seed
+BENCH_PREFIX = "bench-"
+BENCH_PASSWORD = "bench12345"
+USER_COLUMNS = (
+    "name", "username", "password", "phone", "department", "employee_type", "job_position", "company",
+    "bank_name", "account_number", "bank_country", "city", "state", "country", "postal_code", "department_id", "role",
+)
+
+
+class BenchContext:
+    """Seeded rows and tokens shared by the flows of one run."""
+
+    def __init__(self, users: List[asyncpg.Record], department_ids: List[int], run_id: str):
+        self.users = users
+        self.department_ids = department_ids
+        self.run_id = run_id
+        self.user_tokens = [
+            create_access_token({"id": user["id"], "username": user["username"], "role": "user"}) for user in users[:100]
+        ]
+        self.admin_token = create_access_token({"username": f"{BENCH_PREFIX}admin@example.com", "role": "super_admin"})
+
+
+def _bearer(token: str) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _user_payload(username: str, phone: str, department_id: int) -> Dict:
+    return {
+        "name": "Bench User", "username": username, "password": BENCH_PASSWORD, "phone": phone,
+        "department": "Bench", "employee_type": "permanent", "job_position": "Engineer", "company": "Acme",
+        "bank_name": "Bank", "account_number": "123456", "bank_country": "USA", "city": "Springfield",
+        "state": "IL", "country": "USA", "postal_code": "62701", "department_id": str(department_id),
+    }
+
+
+Flow = Callable[[httpx.AsyncClient, BenchContext, int], Awaitable[bool]]
+
+
+async def login(client, ctx, i):
+    user = random.choice(ctx.users)
+    response = await client.post("/api/auth/login", json={"username": user["username"], "password": BENCH_PASSWORD})
+    return response.status_code == 200
+
+
+async def validate_token(client, ctx, i):
+    response = await client.post("/api/auth/validate_token", headers=_bearer(random.choice(ctx.user_tokens)))
+    return response.status_code == 200
+
+
+async def get_user(client, ctx, i):
+    response = await client.get("/api/user/get-user", params={"userid": random.choice(ctx.users)["id"]})
+    return response.status_code == 200
+
+
+async def get_all_users(client, ctx, i):
+    response = await client.get("/api/user/get-all-users", params={"limit": const.PAGE_SIZE_DEFAULT})
+    return response.status_code == 200
+
+
+async def create_department(client, ctx, i):
+    response = await client.post(
+        "/api/department/create-department",
+        json={"name": f"{BENCH_PREFIX}{ctx.run_id}-{i}", "location": "Springfield", "phone": "5550000000",
+              "email": "bench@example.com"},
+        headers=_bearer(ctx.admin_token),
+    )
+    # A duplicate name answers 200 with only a message
+    return response.status_code == 200 and "name" in response.json()
+
+
+async def update_department(client, ctx, i):
+    response = await client.put(
+        f"/api/department/update-department/{random.choice(ctx.department_ids)}",
+        json={"description": f"Updated by run {ctx.run_id} #{i}"},
+        headers=_bearer(ctx.admin_token),
+    )
+    return response.status_code == 200
+
+
+async def register(client, ctx, i):
+    # Phones 8xxxxxxxxx never collide with the seeded 9xxxxxxxxx ones
+    response = await client.post("/api/auth/register", json=_user_payload(
+        f"{BENCH_PREFIX}{ctx.run_id}-{i}@example.com", f"8{i:09d}", random.choice(ctx.department_ids),
+    ))
+    return response.status_code == 200 and "access_token" in response.json()
+
+
+FLOWS: Dict[str, Flow] = {
+    "login": login,
+    "validate_token": validate_token,
+    "get_user": get_user,
+    "get_all_users": get_all_users,
+    "create_department": create_department,
+    "update_department": update_department,
+    "register": register,
+}
+
+
+def bench_database_url() -> str:
+    """BENCH_DATABASE_URL, refusing to run against the application's own database."""
+    if not const.BENCH_DATABASE_URL:
+        raise RuntimeError(
+            "Set BENCH_DATABASE_URL to a database for benchmarks: it is migrated and filled with fixture rows."
+        )
+    if const.BENCH_DATABASE_URL == const.DATABASE_URL:
+        raise RuntimeError("BENCH_DATABASE_URL must not be the application's DATABASE_URL.")
+    return const.BENCH_DATABASE_URL
+
+
+async def seed(users: int, departments: int) -> BenchContext:
+    """
+    Apply migrations, drop the rows of earlier runs and COPY in fresh departments and users.
+    Every user shares one bcrypt hash, so seeding cost does not grow with the hash rounds.
+    """
+    db = await asyncpg.connect(bench_database_url())
+    try:
+        await migrate(db)
+        async with db.transaction():
+            await db.execute("DELETE FROM users WHERE username LIKE $1", f"{BENCH_PREFIX}%")
+            await db.execute("DELETE FROM departments WHERE name LIKE $1", f"{BENCH_PREFIX}%")
+
+            await db.copy_records_to_table(
+                "departments",
+                records=[(f"{BENCH_PREFIX}dept-{i}", "Springfield", "5550000000", "bench@example.com")
+                         for i in range(departments)],
+                columns=("name", "location", "phone", "email"),
+            )
+            department_ids = [row["id"] for row in await db.fetch(
+                "SELECT id FROM departments WHERE name LIKE $1 ORDER BY id", f"{BENCH_PREFIX}dept-%"
+            )]
+
+            hashed = get_password_hash(BENCH_PASSWORD)
+            await db.copy_records_to_table(
+                "users",
+                records=[
+                    ("Bench User", f"{BENCH_PREFIX}{i}@example.com", hashed, f"9{i:09d}", "Bench", "permanent",
+                     "Engineer", "Acme", "Bank", "123456", "USA", "Springfield", "IL", "USA", "62701",
+                     department_ids[i % len(department_ids)], "user")
+                    for i in range(users)
+                ],
+                columns=USER_COLUMNS,
+            )
+            seeded = await db.fetch(
+                "SELECT id, username FROM users WHERE username LIKE $1 ORDER BY id", f"{BENCH_PREFIX}%"
+            )
+        await db.execute("ANALYZE users; ANALYZE departments")
+    finally:
+        await db.close()
+
+    return BenchContext(seeded, department_ids, run_id=f"{int(time.time()) % 1_000_000:06d}")
+
+
+# Started the way `python run.py` starts, so run.check_worker_backends() vets the worker count
+BOOT_SERVER = "import uvicorn, run; uvicorn.run('run:App', **run.server_options(), log_level='warning', access_log=False)"
+
+
+@contextlib.contextmanager
+def boot_server(port: int, workers: int, timeout: float = 30.0) -> Iterator[str]:
+    """Run run:App with run.server_options() in a child process until the block exits; yields its base URL."""
+    base_url = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(
+        [sys.executable, "-c", BOOT_SERVER],
+        cwd=ROOT,
+        env=dict(
+            os.environ,
+            DATABASE_URL=bench_database_url(),
+            SERVER_HOST="127.0.0.1", SERVER_PORT=str(port), SERVER_WORKERS=str(workers), SERVER_RELOAD="False",
+            # Every request comes from one IP and reuses a few hundred usernames: lift the login throttle
+            LOGIN_RATE_LIMIT_PER_IP="1000000000", LOGIN_RATE_LIMIT_PER_USERNAME="1000000000",
+        ),
+    )
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {process.returncode} before it was ready.")
+            try:
+                if httpx.get(f"{base_url}/openapi.json", timeout=1.0).status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Server did not answer on {base_url} within {timeout:.0f}s.")
+            time.sleep(0.2)
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def run_flow(client: httpx.AsyncClient, ctx: BenchContext, flow: Flow, requests: int,
+                   concurrency: int, offset: int = 0) -> Dict:
+    """Send `requests` calls of one flow from `concurrency` workers and summarize their latency."""
+    latencies: List[float] = []
+    errors = 0
+    indexes = iter(range(offset, offset + requests))
+
+    async def worker():
+        nonlocal errors
+        for i in indexes:
+            started = time.perf_counter()
+            try:
+                ok = await flow(client, ctx, i)
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+async def run_load(base_url: str, ctx: BenchContext, flows: List[str], requests: int,
+                   concurrency: int, warmup: int) -> Dict:
+    """Run every selected flow in turn (warm-up calls are not measured) and build the report."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        for name in flows:
+            if warmup:
+                await run_flow(client, ctx, FLOWS[name], warmup, min(concurrency, warmup), offset=requests)
+            results[name] = await run_flow(client, ctx, FLOWS[name], requests, concurrency)
+
+    return {
+        "kind": "load",
+        "meta": {
+            "started_at": datetime.now(tz=timezone.utc).isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "base_url": base_url,
+            "users": len(ctx.users),
+            "departments": len(ctx.department_ids),
+            "requests_per_flow": requests,
+            "concurrency": concurrency,
+            "warmup": warmup,
+        },
+        "results": results,
+    }
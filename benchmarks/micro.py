@@ -0,0 +1,72 @@
+import platform
+import timeit
+from datetime import datetime, timezone
+from typing import Callable, Dict
+
+from jose import jwt
+from pydantic import ValidationError
+
+from benchmarks.report import git_commit
+from main.src.apis.models.user import CreateUser
+from tools import token
+from tools.constant import ALGORITHM
+
+VALID_USER = {
+    "name": "Bench User", "username": "bench-micro@example.com", "password": "bench12345",
+    "phone": "9000000000", "department": "Bench", "employee_type": "permanent", "job_position": "Engineer",
+    "company": "Acme", "bank_name": "Bank", "account_number": "123456", "bank_country": "USA",
+    "city": "Springfield", "state": "IL", "country": "USA", "postal_code": "62701", "department_id": "1",
+}
+# Fails the phone and password validators, the two that run custom Python code
+INVALID_USER = dict(VALID_USER, phone="12ab", password="onlyletters")
+
+
+def _validate_invalid_user():
+    try:
+        CreateUser.model_validate(INVALID_USER)
+    except ValidationError:
+        pass
+
+
+def _cases() -> Dict[str, Callable[[], object]]:
+    claims = {"id": 1, "username": "bench-micro@example.com", "role": "user"}
+    access_token = token.create_access_token(claims)
+    verification_key = token.access_verification_key(access_token)
+
+    def decode_uncached():
+        # Clear first so every call pays for signature verification
+        token.access_token_cache.clear()
+        return token.validate_access_token(access_token)
+
+    return {
+        "token.create_access_token": lambda: token.create_access_token(claims),
+        "token.create_refresh_token": lambda: token.create_refresh_token(claims),
+        "jose.jwt.decode": lambda: jwt.decode(access_token, verification_key, algorithms=[ALGORITHM]),
+        "token.validate_access_token[cached]": lambda: token.validate_access_token(access_token),
+        "token.validate_access_token[uncached]": decode_uncached,
+        "CreateUser.model_validate[valid]": lambda: CreateUser.model_validate(VALID_USER),
+        "CreateUser.model_validate[invalid]": _validate_invalid_user,
+    }
+
+
+def run_micro(repeat: int = 5) -> Dict:
+    """
+    Time each case with timeit: calibrate a loop count that runs for at least 0.2s,
+    then keep the best of `repeat` runs (the least disturbed by the rest of the machine).
+    """
+    results = {}
+    for name, func in _cases().items():
+        timer = timeit.Timer(func)
+        loops, _ = timer.autorange()
+        best = min(timer.repeat(repeat=repeat, number=loops)) / loops
+        results[name] = {"loops": loops, "per_op_us": best * 1_000_000, "ops_per_second": 1 / best}
+    return {
+        "kind": "micro",
+        "meta": {
+            "started_at": datetime.now(tz=timezone.utc).isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
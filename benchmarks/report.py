@@ -0,0 +1,59 @@
+import math
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], wall_seconds: float, errors: int = 0) -> Dict:
+    """Latency percentiles in milliseconds and throughput of one measured run."""
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "rps": len(values) / wall_seconds if wall_seconds else 0.0,
+        "mean_ms": sum(values) / len(values) * 1000 if values else 0.0,
+        "p50_ms": percentile(values, 50) * 1000,
+        "p95_ms": percentile(values, 95) * 1000,
+        "p99_ms": percentile(values, 99) * 1000,
+        "max_ms": values[-1] * 1000 if values else 0.0,
+    }
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """
+    Regressions between two reports of the same kind: p95 latency (or per-op or import time) up,
+    or throughput down, by more than `threshold` percent.
+    """
+    regressions = []
+    for name, before in baseline.get("results", {}).items():
+        after = current.get("results", {}).get(name)
+        if after is None:
+            continue
+        for key, worse_when_higher in (("p95_ms", True), ("rps", False), ("per_op_us", True),
+                                        ("wall_ms", True), ("cumulative_us", True)):
+            if key not in before or key not in after or not before[key]:
+                continue
+            change = (after[key] - before[key]) / before[key] * 100
+            if (change if worse_when_higher else -change) > threshold:
+                regressions.append(f"{name}.{key}: {before[key]:.3f} -> {after[key]:.3f} ({change:+.1f}%)")
+    return regressions
+
+
+def git_commit() -> Optional[str]:
+    """Commit the benchmark ran against, recorded so reports can be lined up later."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
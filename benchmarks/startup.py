@@ -0,0 +1,94 @@
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+from benchmarks.report import ROOT, git_commit
+
+# (self µs, cumulative µs, module, nesting depth) of one `-X importtime` line
+ImportLine = Tuple[int, int, str, int]
+
+
+def parse_importtime(stderr: str) -> List[ImportLine]:
+    """
+    Parse the `import time: self | cumulative | module` lines Python writes to stderr.
+    Nested imports are indented by two spaces per level below the module that imported them.
+    """
+    lines = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # The header line
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        lines.append((int(self_us), int(cumulative_us), name.strip(), depth))
+    return lines
+
+
+def _import_once(target: str, env: Dict[str, str]) -> Tuple[float, List[ImportLine]]:
+    started = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - started
+    if process.returncode != 0:
+        raise RuntimeError(f"`import {target}` failed:\n{process.stderr[-2000:]}")
+    return wall, parse_importtime(process.stderr)
+
+
+def run_startup(target: str = "run", repeat: int = 5, top: int = 25) -> Dict:
+    """
+    Import `target` in `repeat` fresh interpreters with -X importtime and report the median
+    wall time, the self time summed per top-level package, and the slowest modules by
+    cumulative time (median over the runs), so an import that crept onto the startup path stands out.
+    """
+    # Measures a warm start, as after a deploy's first boot: bytecode must be cached, not compiled per run
+    env = {name: value for name, value in os.environ.items() if name != "PYTHONDONTWRITEBYTECODE"}
+    _import_once(target, env)  # Warm the OS file cache and write any missing .pyc files first
+
+    walls = []
+    per_module: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+    totals = []
+    for _ in range(repeat):
+        wall, lines = _import_once(target, env)
+        walls.append(wall)
+        totals.append(sum(cumulative for _, cumulative, _, depth in lines if depth == 0))
+        for self_us, cumulative_us, name, _ in lines:
+            per_module[name].append((self_us, cumulative_us))
+
+    modules = {
+        name: {
+            "self_us": statistics.median(s for s, _ in samples),
+            "cumulative_us": statistics.median(c for _, c in samples),
+        }
+        for name, samples in per_module.items()
+    }
+    packages: Dict[str, float] = defaultdict(float)
+    for name, timing in modules.items():
+        packages[name.split(".")[0]] += timing["self_us"]
+
+    results = {f"import {target}": {"wall_ms": statistics.median(walls) * 1000,
+                                    "cumulative_us": statistics.median(totals),
+                                    "modules": len(modules)}}
+    for name in sorted(modules, key=lambda name: modules[name]["cumulative_us"], reverse=True)[:top]:
+        results[name] = modules[name]
+
+    return {
+        "kind": "startup",
+        "meta": {
+            "started_at": datetime.now(tz=timezone.utc).isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "target": target,
+            "repeat": repeat,
+        },
+        "results": results,
+        "packages_self_us": dict(sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]),
+    }
@@ -0,0 +1,47 @@
+"""
+Create an access-token signing key for ALGORITHM=RS256/RS384/RS512 or ES256/ES384/ES512.
+
+    python keygen.py 2026-10                     # JWT_KEYS_DIR/2026-10.pem for the configured ALGORITHM
+    python keygen.py 2026-10 --algorithm ES256
+
+Rotation: create the new key, deploy with JWT_ACTIVE_KID set to it (the old key keeps
+verifying), then delete the old file once ACCESS_TOKEN_EXPIRE_MINUTES have passed.
+"""
+import argparse
+import os
+from pathlib import Path
+
+from tools import constant as const
+
+CURVES = {"ES256": "NIST256p", "ES384": "NIST384p", "ES512": "NIST521p"}
+
+
+def generate_pem(algorithm: str, bits: int) -> bytes:
+    if algorithm.startswith("RS"):
+        import rsa
+        _, private_key = rsa.newkeys(bits)
+        return private_key.save_pkcs1()
+    if algorithm in CURVES:
+        import ecdsa
+        return ecdsa.SigningKey.generate(curve=getattr(ecdsa, CURVES[algorithm])).to_pem()
+    raise SystemExit(f"{algorithm} is not an asymmetric algorithm; use RS256/384/512 or ES256/384/512.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a JWT signing key")
+    parser.add_argument("kid", help="Key id, also the file name (e.g. 2026-10)")
+    parser.add_argument("--algorithm", default=const.ALGORITHM, help="Defaults to ALGORITHM")
+    parser.add_argument("--bits", type=int, default=2048, help="RSA key size")
+    args = parser.parse_args()
+
+    directory = Path(const.JWT_KEYS_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{args.kid}.pem"
+    if path.exists():
+        raise SystemExit(f"{path} already exists; pick a new kid.")
+
+    # Private key: readable by the owner only
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(generate_pem(args.algorithm, args.bits))
+    print(f"Wrote {path}")
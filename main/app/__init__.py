@@ -1,28 +1,62 @@
+import importlib
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from tools.database import init_pool, close_pool
+from tools.token import shutdown_password_hasher
+from tools.revocation import refresh_token_revocations
+from tools.keys import get_key_set, is_asymmetric
+from tools.middleware import RoleMiddleware, PUBLIC_ROUTES, docs_routes
+from tools.metrics import MetricsMiddleware
+from tools.constant import GLOBAL_AUTH_ENABLED, METRICS_ENABLED, ENABLED_ROUTERS
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the shared database pool once per worker and release pools on shutdown
+    if is_asymmetric():
+        get_key_set()  # Fail at startup, not on the first login, when signing keys are missing
+    await init_pool()
+    await refresh_token_revocations.start()
+    try:
+        yield
+    finally:
+        await refresh_token_revocations.stop()
+        await close_pool()
+        shutdown_password_hasher()
+
 
 main_app = FastAPI(
     title="ERP System APIs",
     docs_url="/dx",
     redoc_url="/rx",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,  # orjson is pinned in requirements.txt
 )
 
 # Add middleware globally to the FastAPI application
-# main_app.add_middleware(RoleMiddleware)  # Apply your custom RoleMiddleware globally
-
-# Include routers in the main app
-def gather_router(routers):
-    for router in routers:
-        main_app.include_router(router)
-
-if main_app:
-    from ..src.apis import user
-    from ..src.apis import auth
-    from ..src.apis import department
-
-    gather_router(
-        [
-            user.router,
-            auth.router,
-            department.router,
-        ]
-    )
\ No newline at end of file
+if GLOBAL_AUTH_ENABLED:
+    # Apply your custom RoleMiddleware globally; the docs paths come from the app so they follow docs_url etc.
+    main_app.add_middleware(RoleMiddleware, public_routes=PUBLIC_ROUTES | docs_routes(main_app))
+
+# Added last so it wraps RoleMiddleware and also counts rejected requests
+if METRICS_ENABLED:
+    main_app.add_middleware(MetricsMiddleware)
+
+# Router modules of main/src/apis, mounted in this order
+ROUTERS = ("user", "auth", "department", "org", "search", "metrics", "jwks", "health")
+
+
+def gather_router(names):
+    """Import each router module only when it is mounted, so disabled routers cost nothing at startup."""
+    unknown = sorted(set(names) - set(ROUTERS))
+    if unknown:
+        raise RuntimeError(f"ENABLED_ROUTERS has unknown routers: {', '.join(unknown)}. Available: {', '.join(ROUTERS)}")
+    for name in ROUTERS:
+        if name in names:
+            module = importlib.import_module(f"..src.apis.{name}", __package__)
+            main_app.include_router(module.router)
+
+
+gather_router(ENABLED_ROUTERS or ROUTERS)
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, HTTPException, Depends
-from main.src.apis.models.user import CreateUser, UserCredentials
+from fastapi import APIRouter, HTTPException, Depends, Request
+from main.src.apis.models.user import CreateUser, UserCredentials, LogoutRequest
 from main.src.apis.database.user import (
     create_user_service,
 )
 
 from main.src.apis.authentication.login import user_login
-from tools.token import create_access_token,validate_refresh_token,get_bearer_token,verify_password,validate_access_token
+from tools.token import create_access_token,create_refresh_token,validate_refresh_token,get_bearer_token,verify_password_async,revoke_token
+from tools.middleware import Principal, get_principal
+from tools.revocation import refresh_token_revocations
+from tools.ratelimit import enforce_login_rate_limit, reset_login_rate_limit
 from main.src.apis.database.user import verify_user
 
 router = APIRouter(prefix="/api/auth", tags=["AUTH"])
@@ -21,11 +24,17 @@ async def create_user(user: CreateUser):
         # Pass the user to the service to save
         return await create_user_service(user)
 
+    except HTTPException:
+        # Keeps the 503s (hash queue full, pool exhausted) and their Retry-After intact
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error creating user: {e}")
     
 @router.post("/login")
-async def login(user: UserCredentials):
+async def login(user: UserCredentials, request: Request):
+    # Throttle by username and client IP before any database or bcrypt work
+    attempt = await enforce_login_rate_limit(user.username, request.client.host if request.client else None)
+
     # Verify user details
     user_data = await verify_user(user.username)
     
@@ -35,19 +44,23 @@ async def login(user: UserCredentials):
     hashed_password = user_data["password"]
     
     # Verify the password
-    if verify_password(user.password, hashed_password):
+    if await verify_password_async(user.password, hashed_password):
+        await reset_login_rate_limit(attempt)
         token_data = {
-            "username": user.username,
-            "role": "test"  # Assuming "user" role; adjust if necessary
+            "id": user_data["id"],
+            "username": user_data["username"],
+            "role": user_data["role"]
         }
         
-        # Create JWT access token
+        # Create JWT access token, plus a refresh token that is rotated on every use
         access_token = create_access_token(data=token_data)
+        refresh_token = create_refresh_token(data=token_data)
         
         return {
             "message": "Login successful",
             "user": token_data,
-            "access_token": access_token
+            "access_token": access_token,
+            "refresh_token": refresh_token
         }
     else:
         raise HTTPException(status_code=401, detail="Incorrect username or password")
@@ -83,51 +96,55 @@ async def login(user: UserCredentials):
 @router.post("/refresh")
 async def refresh_token(token: str = Depends(get_bearer_token)):
     """
-    Refresh the access token using a valid refresh token.
+    Exchange a refresh token for a new access token and a new refresh token.
+    Each refresh token works once: presenting it again is rejected.
     """
     payload = validate_refresh_token(token)
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid or expired refresh token.")
 
+    # Rotation: revoke the presented token atomically, a concurrent or replayed refresh loses
+    if not await refresh_token_revocations.consume(payload["jti"], payload["exp"]):
+        raise HTTPException(status_code=401, detail="Refresh token has already been used.")
+
     # Generate a new access token
-    user_data = {
-        "username": payload["username"],
-        "role": payload["role"]
-    }
+    user_data = {key: payload[key] for key in ("id", "username", "role") if key in payload}
     new_access_token = create_access_token(data=user_data)
 
     return {
-        "access_token": new_access_token
+        "access_token": new_access_token,
+        "refresh_token": create_refresh_token(data=user_data)
     }
 
-@router.post("/validate_token")
-async def validate_token(
-    token: str = Depends(get_bearer_token)
+
+@router.post("/logout")
+async def logout(
+    body: LogoutRequest = None,
+    token: str = Depends(get_bearer_token),
+    principal: Principal = Depends(get_principal),
 ):
     """
-    Validate the JWT token and return decoded token details.
+    Revoke the refresh token (everywhere, until it expires) and the access token (in this worker).
     """
-    try:
-        # Validate the token
-        payload = validate_access_token(token)
+    if body is not None and body.refresh_token:
+        refresh_payload = validate_refresh_token(body.refresh_token)
+        if refresh_payload.get("username") != principal.username:
+            raise HTTPException(status_code=403, detail="Refresh token belongs to another user.")
+        await refresh_token_revocations.revoke(refresh_payload["jti"], refresh_payload["exp"])
 
-        # Extract the username and role from the payload
-        username = payload.get("username")
-        role = payload.get("role")
+    revoke_token(token)
+    return {"message": "Logged out."}
 
-        if not username or not role:
-            raise HTTPException(status_code=401, detail="Invalid token payload. Required fields are missing.")
-
-        # If token is valid, return success and decoded payload
-        return {
-            "message": "Token validation successful",
-            "role": role,
-            "user": {
-                "username": username
-                
-            }
+@router.post("/validate_token")
+async def validate_token(principal: Principal = Depends(get_principal)):
+    """
+    Validate the JWT token and return decoded token details.
+    """
+    return {
+        "message": "Token validation successful",
+        "role": principal.role,
+        "user": {
+            "id": principal.id,
+            "username": principal.username
         }
-
-    except Exception as e:
-        # Handle unexpected errors
-        raise HTTPException(status_code=500, detail="An unexpected error occurred.")
\ No newline at end of file
+    }
@@ -2,7 +2,7 @@ from fastapi import HTTPException
 from main.src.apis.database.user import verify_user
 from hashlib import md5
 from fastapi import HTTPException
-from tools.token import create_access_token, verify_password
+from tools.token import create_access_token, verify_password_async
 
 def is_already_loggedin(cookie):
     return True if cookie.get("token") else False
@@ -18,10 +18,11 @@ async def user_login(cookie, username, password):
         hashed_password = user_data["password"]
         
         # Verify the password
-        if verify_password(password, hashed_password):
+        if await verify_password_async(password, hashed_password):
             user_data = {
-                "username": username,
-                "role": "user"  # Assuming "user" role here; adjust if necessary
+                "id": user_data["id"],
+                "username": user_data["username"],
+                "role": user_data["role"]
             }
             
             # Create JWT access token
@@ -29,7 +30,7 @@ async def user_login(cookie, username, password):
 
             return {
                 "message": "Login successful",
-                "user": {"username": username, "role": "user"},
+                "user": user_data,
                 "access_token": access_token  # Return token to be set in response at the route level
             }
         else:
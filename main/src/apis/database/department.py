@@ -1,110 +1,297 @@
+from datetime import datetime
 from fastapi import HTTPException
-from tools.database import Db
-from main.src.apis.models.department import Department
-from typing import Dict
+from tools.database import connection, stream
+from tools import statements
+from tools.statements import register_statement, hot_query
+from tools.query_builder import UpdateBuilder
+from tools.pagination import encode_cursor, decode_cursor
+from tools.constant import PAGE_SIZE_DEFAULT, DEPARTMENT_CACHE_TTL
+from tools.cache import ReadThroughCache, create_cache_backend
+from main.src.apis.models.department import Department, UpdateDepartment, DepartmentBatch
+from typing import Dict, List, Optional, Tuple
+import asyncpg
 from asyncpg import Record
+
+# Columns of the departments table, in table order
+DEPARTMENT_COLUMNS = ("id", "name", "description", "manager_id", "location", "phone", "email", "created_at", "updated_at")
+DEPARTMENT_SELECT = ", ".join(DEPARTMENT_COLUMNS)
+
+# Columns a listing may be sorted by; all are NOT NULL so (column, id) is a total order
+DEPARTMENT_SORT_KEYS = ("id", "name", "created_at")
+
+# Hot statements, prepared once per pooled connection (see tools.statements)
+DEPARTMENT_BY_ID = hot_query(
+    register_statement("department.get_by_id", f"SELECT {DEPARTMENT_SELECT} FROM departments WHERE id = $1"), 1
+)
+DEPARTMENT_DELETE = register_statement("department.delete", "DELETE FROM departments WHERE id = $1 RETURNING id, name")
+DEPARTMENT_UPDATE = UpdateBuilder("department.update", "departments", UpdateDepartment.model_fields, "id", returning=DEPARTMENT_SELECT)
+DEPARTMENT_INSERT = register_statement("department.insert", f"""
+    INSERT INTO departments (name, description, manager_id, location, phone, email)
+    VALUES ($1, $2, $3, $4, $5, $6)
+    ON CONFLICT (name) DO NOTHING
+    RETURNING {DEPARTMENT_SELECT}
+""")
+
+# Set-based batch statements: one round trip per section however many items it has
+DEPARTMENT_BATCH_INSERT = register_statement("department.batch_insert", f"""
+    INSERT INTO departments (name, description, manager_id, location, phone, email)
+    SELECT * FROM UNNEST($1::text[], $2::text[], $3::int[], $4::text[], $5::text[], $6::text[])
+    ON CONFLICT DO NOTHING
+    RETURNING {DEPARTMENT_SELECT}
+""")
+DEPARTMENT_BATCH_UPDATE = register_statement("department.batch_update", f"""
+    UPDATE departments AS d SET
+        name = COALESCE(u.name, d.name),
+        description = COALESCE(u.description, d.description),
+        manager_id = COALESCE(u.manager_id, d.manager_id),
+        location = COALESCE(u.location, d.location),
+        phone = COALESCE(u.phone, d.phone),
+        email = COALESCE(u.email, d.email),
+        updated_at = CURRENT_TIMESTAMP
+    FROM UNNEST($1::int[], $2::text[], $3::text[], $4::int[], $5::text[], $6::text[], $7::text[])
+        AS u(id, name, description, manager_id, location, phone, email)
+    WHERE d.id = u.id
+    RETURNING {", ".join(f"d.{column}" for column in DEPARTMENT_COLUMNS)}
+""")
+DEPARTMENT_BATCH_DELETE = register_statement(
+    "department.batch_delete", "DELETE FROM departments WHERE id = ANY($1::int[]) RETURNING id, name"
+)
+
+# Departments are read far more often than written: single rows are cached under "id:<id>",
+# listing pages under "list:...", and any write drops both at once (see ReadThroughCache)
+department_cache = ReadThroughCache("departments", create_cache_backend(), ttl=DEPARTMENT_CACHE_TTL)
+
+async def invalidate_department_cache():
+    await department_cache.invalidate()
+
 # Fetch a single department by ID
 async def get_a_department_from_database(department_id: int):
-    db = await Db()
+    async def load():
+        async with connection() as db:
+            row = await statements.fetchrow(db, DEPARTMENT_BY_ID, department_id)
+        return dict(row) if row else None
 
-    result = await db.fetchrow(
-        "SELECT id, code, description, manager_id, budget, location, phone, email, created_at, updated_at FROM departments WHERE id = $1",
-        department_id
-    )
-
-    db.close()
+    result = await department_cache.get_or_load(f"id:{department_id}", load)
 
     if not result:
         raise HTTPException(status_code=404, detail="Department not found")
 
     return Department(**result)
 
-# Fetch all departments
-async def get_all_departments_from_database():
-    db = await Db()
-    result = await db.fetch(
-        "SELECT id, code, description, manager_id, budget, location, phone, email, created_at, updated_at FROM departments"
-    )
-    db.close()
-    return [Department(**department) for department in result]
+def _parse_department_sort(sort: str) -> Tuple[str, bool]:
+    descending = sort.startswith("-")
+    column = sort.lstrip("-")
+    if column not in DEPARTMENT_SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"Cannot sort by '{column}'. Allowed: {', '.join(DEPARTMENT_SORT_KEYS)}.")
+    return column, descending
 
-# Create a new department
-async def create_department_service(department: Department):
-    db = await Db()
+def _parse_department_fields(fields: Optional[str], sort_column: str) -> List[str]:
+    if not fields:
+        return list(DEPARTMENT_COLUMNS)
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in DEPARTMENT_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown department fields: {', '.join(unknown)}.")
+    # id and the sort column are always returned, they make up the keyset cursor
+    return [column for column in DEPARTMENT_COLUMNS if column in requested or column in ("id", sort_column)]
 
-    # Check if the department code already exists
-    query_check = "SELECT id FROM departments WHERE code = $1"
-    existing_department = await db.fetchrow(query_check, department.code)
+def _build_department_listing_query(fields: Optional[str], sort: str, cursor: Optional[str]):
+    sort_column, descending = _parse_department_sort(sort)
+    columns = _parse_department_fields(fields, sort_column)
+    direction, comparison = ("DESC", "<") if descending else ("ASC", ">")
 
-    if existing_department:
-        db.close()
-        return {"message": "Department code already exists."}
+    args = []
+    where = ""
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != 3 or values[0] != sort or not isinstance(values[2], int):
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+        last_value, last_id = values[1], values[2]
+        if sort_column == "id":
+            args = [last_id]
+            where = f" WHERE id {comparison} $1"
+        else:
+            if sort_column == "created_at":
+                try:
+                    last_value = datetime.fromisoformat(last_value)
+                except (TypeError, ValueError):
+                    raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+            args = [last_value, last_id]
+            where = f" WHERE ({sort_column}, id) {comparison} ($1, $2)"
 
-    # Insert the new department into the database
-    query = """
-    INSERT INTO departments (name, description, manager_id, location, phone, email)
-    VALUES ($1, $2, $3, $4, $5, $6, $7)
-    RETURNING id, name, description, manager_id, location, phone, email, created_at, updated_at;
-    """
-    result = await db.fetchrow(
-        query,
-        department.name,
-        department.description,
-        department.manager_id,
-        department.location,
-        department.phone,
-        department.email
-    )
+    order_by = f"id {direction}" if sort_column == "id" else f"{sort_column} {direction}, id {direction}"
+    query = f"SELECT {', '.join(columns)} FROM departments{where} ORDER BY {order_by}"
+    return query, args, sort_column
 
-    if not result:
-        db.close()
-        raise HTTPException(status_code=500, detail="Department creation failed.")
+# Pages sorted by name or created_at must be served by their (column, id) indexes; the SQL is
+# assembled per request, so these are timed statements rather than registered ones
+for _sort in ("name", "created_at"):
+    _query, _args, _ = _build_department_listing_query(None, _sort, None)
+    hot_query(statements.adhoc_statement(f"department.list_page[{_sort}]", f"{_query} LIMIT ${len(_args) + 1}"),
+              *_args, PAGE_SIZE_DEFAULT + 1)
 
-    db.close()
-    return Department(**result)
+# Fetch one page of departments
+async def get_all_departments_from_database(limit: int = PAGE_SIZE_DEFAULT, cursor: Optional[str] = None,
+                                            sort: str = "id", fields: Optional[str] = None):
+    query, args, sort_column = _build_department_listing_query(fields, sort, cursor)
 
-# Update an existing department
-async def update_department_service(department_id: int, department_data: Dict):
-    db = await Db()
+    async def load():
+        # Fetch one extra row to know whether another page exists
+        async with connection() as db:
+            statement = statements.adhoc_statement("department.list_page", f"{query} LIMIT ${len(args) + 1}")
+            result = await statements.fetch(db, statement, *args, limit + 1)
+
+        has_more = len(result) > limit
+        result = result[:limit]
+        next_cursor = None
+        if has_more:
+            last = result[-1]
+            next_cursor = encode_cursor([sort, last[sort_column], last["id"]])
+
+        return {
+            "items": [dict(department) for department in result],
+            "next_cursor": next_cursor,
+        }
+
+    return await department_cache.get_or_load(f"list:{limit}:{sort}:{fields}:{cursor}", load)
+
+# Stream every department through a server-side cursor
+def stream_departments_from_database(cursor: Optional[str] = None, sort: str = "id", fields: Optional[str] = None):
+    query, args, _ = _build_department_listing_query(fields, sort, cursor)
+    return stream(query, *args)
 
-    # Filter fields dynamically based on input
-    fields_to_update = {key: value for key, value in department_data.items() if value is not None}
+# Create a new department
+async def create_department_service(department: Department):
+    # The unique index on name turns a duplicate into an empty RETURNING, no pre-check needed
+    async with connection() as db:
+        result = await statements.fetchrow(
+            db, DEPARTMENT_INSERT,
+            department.name,
+            department.description,
+            department.manager_id,
+            department.location,
+            department.phone,
+            department.email
+        )
 
-    if not fields_to_update:
-        raise HTTPException(status_code=400, detail="No fields provided to update.")
+    if result is None:
+        return {"message": "Department code already exists."}
 
-    # Build dynamic query
-    set_clauses = ", ".join([f"{field} = ${index}" for index, field in enumerate(fields_to_update.keys(), start=1)])
-    query = f"""
-    UPDATE departments
-    SET {set_clauses}, updated_at = CURRENT_TIMESTAMP
-    WHERE id = ${len(fields_to_update) + 1}
-    RETURNING id, code, description, manager_id, budget, location, phone, email, created_at, updated_at;
-    """
+    await invalidate_department_cache()
+    return Department(**result)
 
-    # Prepare query values
-    values = list(fields_to_update.values()) + [department_id]
+# Update an existing department
+async def update_department_service(department_id: int, department_data: UpdateDepartment):
+    # Whitelisted, cached UPDATE statement for the provided fields
+    statement, values = DEPARTMENT_UPDATE.build(department_data.model_dump(exclude_none=True), department_id)
 
     # Execute the query
-    async with db.transaction():
-        updated_department: Record = await db.fetchrow(query, *values)
+    async with connection() as db:
+        async with db.transaction():
+            updated_department: Record = await statements.fetchrow(db, statement, *values)
 
     if not updated_department:
         raise HTTPException(status_code=404, detail="Update failed.")
 
-    db.close()
+    await invalidate_department_cache()
     return Department(**updated_department)
 
 # Delete a department
 async def delete_department_service(department_id: int):
-    db = await Db()
-
-    query = "DELETE FROM departments WHERE id = $1 RETURNING id, code;"
-    result = await db.fetchrow(query, department_id)
-
-    db.close()
+    async with connection() as db:
+        result = await statements.fetchrow(db, DEPARTMENT_DELETE, department_id)
 
     if not result:
         raise HTTPException(status_code=404, detail="Department not found or could not be deleted.")
 
-    return {"message": "Department deleted successfully.", "department": dict(result)}
\ No newline at end of file
+    await invalidate_department_cache()
+    return {"message": "Department deleted successfully.", "department": dict(result)}
+
+def _batch_error(index: int, error: str) -> dict:
+    return {"index": index, "status": "error", "error": error}
+
+# Apply creates, partial updates and deletes in a single transaction
+async def batch_department_service(batch: DepartmentBatch):
+    results = {"create": [], "update": [], "delete": []}
+
+    # Reject repeated names / ids up front, set-based statements cannot report them per item
+    creates, names = [], set()
+    for index, department in enumerate(batch.create):
+        if department.name in names:
+            results["create"].append(_batch_error(index, "Duplicate department name in batch."))
+        else:
+            names.add(department.name)
+            creates.append((index, department))
+
+    updates, update_ids = [], set()
+    for index, department in enumerate(batch.update):
+        if department.id in update_ids:
+            results["update"].append(_batch_error(index, "Duplicate department id in batch."))
+        elif not department.model_dump(exclude={"id"}, exclude_none=True):
+            results["update"].append(_batch_error(index, "No fields provided to update."))
+        else:
+            update_ids.add(department.id)
+            updates.append((index, department))
+
+    delete_ids = list(dict.fromkeys(batch.delete))
+
+    try:
+        async with connection() as db:
+            async with db.transaction():
+                created = {}
+                if creates:
+                    rows = await statements.fetch(
+                        db, DEPARTMENT_BATCH_INSERT,
+                        *(list(column) for column in zip(*(
+                            (d.name, d.description, d.manager_id, d.location, d.phone, d.email) for _, d in creates
+                        ))),
+                    )
+                    created = {row["name"]: row for row in rows}
+
+                updated = {}
+                if updates:
+                    rows = await statements.fetch(
+                        db, DEPARTMENT_BATCH_UPDATE,
+                        *(list(column) for column in zip(*(
+                            (d.id, d.name, d.description, d.manager_id, d.location, d.phone, d.email) for _, d in updates
+                        ))),
+                    )
+                    updated = {row["id"]: row for row in rows}
+
+                deleted = {}
+                if delete_ids:
+                    rows = await statements.fetch(db, DEPARTMENT_BATCH_DELETE, delete_ids)
+                    deleted = {row["id"]: row for row in rows}
+    except asyncpg.UniqueViolationError as e:
+        raise HTTPException(status_code=409, detail=f"Batch rejected, nothing was applied: {e.detail or e}")
+    except asyncpg.ForeignKeyViolationError as e:
+        raise HTTPException(status_code=409, detail=f"Batch rejected, nothing was applied: {e.detail or e}")
+
+    for index, department in creates:
+        row = created.get(department.name)
+        if row is None:
+            results["create"].append(_batch_error(index, "Department name already exists."))
+        else:
+            results["create"].append({"index": index, "status": "created", "department": dict(row)})
+
+    for index, department in updates:
+        row = updated.get(department.id)
+        if row is None:
+            results["update"].append(_batch_error(index, "Department not found."))
+        else:
+            results["update"].append({"index": index, "status": "updated", "department": dict(row)})
+
+    for index, department_id in enumerate(batch.delete):
+        row = deleted.pop(department_id, None)
+        if row is None:
+            results["delete"].append(_batch_error(index, "Department not found or already deleted."))
+        else:
+            results["delete"].append({"index": index, "status": "deleted", "department": dict(row)})
+
+    for section in results.values():
+        section.sort(key=lambda item: item["index"])
+
+    if created or updated or delete_ids:
+        await invalidate_department_cache()
+
+    return results
@@ -0,0 +1,82 @@
+from typing import Dict, List, Optional
+from fastapi import HTTPException
+from tools.database import connection
+from tools import statements
+from tools.statements import register_statement, hot_query
+from tools.constant import ORG_MAX_DEPTH, ORG_SUBTREE_MAX_ROWS
+
+# Columns returned for every member of a subtree or chain
+ORG_MEMBER_SELECT = "u.id, u.name, u.username, u.job_position, u.department_id, u.role, u.manager_id, t.depth"
+
+# Recursive walks over users.manager_id (see migrations/0004_org_hierarchy.sql), one round trip each.
+# `path` holds the ids already visited, so a reporting cycle ends the walk instead of looping.
+# The subtree's row budget sits on `walked`, which reads the recursion lazily: the walk stops after
+# $3 members (level by level, so a cut subtree keeps its upper levels) and only those are sorted.
+ORG_SUBTREE = hot_query(register_statement("org.subtree", f"""
+    WITH RECURSIVE t AS (
+        SELECT id, 0 AS depth, ARRAY[id] AS path FROM users WHERE id = $1
+        UNION ALL
+        SELECT u.id, t.depth + 1, t.path || u.id
+        FROM t JOIN users AS u ON u.manager_id = t.id
+        WHERE t.depth < $2 AND u.id <> ALL(t.path)
+    ), walked AS (
+        SELECT * FROM t LIMIT $3
+    )
+    SELECT {ORG_MEMBER_SELECT} FROM walked AS t JOIN users AS u ON u.id = t.id
+    ORDER BY t.path
+"""), 1, ORG_MAX_DEPTH, ORG_SUBTREE_MAX_ROWS + 1)
+ORG_CHAIN = register_statement("org.chain", f"""
+    WITH RECURSIVE t AS (
+        SELECT id, manager_id, 0 AS depth, ARRAY[id] AS path FROM users WHERE id = $1
+        UNION ALL
+        SELECT u.id, u.manager_id, t.depth + 1, t.path || u.id
+        FROM t JOIN users AS u ON u.id = t.manager_id
+        WHERE t.depth < $2 AND u.id <> ALL(t.path)
+    )
+    SELECT {ORG_MEMBER_SELECT} FROM t JOIN users AS u ON u.id = t.id
+    ORDER BY t.depth
+""")
+# Counted from users_department_id_id_idx; departments without users report 0
+DEPARTMENT_HEADCOUNT = register_statement("org.department_headcount", """
+    SELECT d.id, d.name, d.manager_id, COUNT(u.id) AS headcount
+    FROM departments AS d LEFT JOIN users AS u ON u.department_id = d.id
+    WHERE $1::int IS NULL OR d.id = $1
+    GROUP BY d.id
+    ORDER BY d.id
+""")
+
+
+def _depth(max_depth: Optional[int]) -> int:
+    return ORG_MAX_DEPTH if max_depth is None else min(max_depth, ORG_MAX_DEPTH)
+
+
+async def get_org_subtree_from_database(user_id: int, max_depth: Optional[int] = None,
+                                        limit: int = ORG_SUBTREE_MAX_ROWS) -> Dict:
+    # Fetch one extra row to know whether the subtree was cut short
+    async with connection() as db:
+        rows = await statements.fetch(db, ORG_SUBTREE, user_id, _depth(max_depth), limit + 1)
+
+    if not rows:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return {"items": [dict(row) for row in rows[:limit]], "truncated": len(rows) > limit}
+
+
+async def get_org_chain_from_database(user_id: int) -> Dict:
+    async with connection() as db:
+        rows = await statements.fetch(db, ORG_CHAIN, user_id, ORG_MAX_DEPTH)
+
+    if not rows:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return {"items": [dict(row) for row in rows]}
+
+
+async def get_department_headcount_from_database(department_id: Optional[int] = None) -> List[Dict]:
+    async with connection() as db:
+        rows = await statements.fetch(db, DEPARTMENT_HEADCOUNT, department_id)
+
+    if department_id is not None and not rows:
+        raise HTTPException(status_code=404, detail="Department not found")
+
+    return [dict(row) for row in rows]
@@ -0,0 +1,137 @@
+import re
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from tools.database import connection
+from tools import statements
+from tools.statements import Statement, register_statement, hot_query
+from tools.pagination import encode_cursor, decode_cursor
+from tools.constant import PAGE_SIZE_DEFAULT, SEARCH_MAX_TERMS
+
+SEARCH_TYPES = ("user", "department")
+
+# Letters and digits only: every term is safe to splice into a tsquery as "term:*"
+SEARCH_TERM = re.compile(r"[^\W_]+")
+
+# Whether pg_trgm is installed (see migrations/0005_search.sql); checked once per worker process
+_trigram_available: Optional[bool] = None
+
+
+def _search_query(q: str) -> str:
+    """Turn free text into a prefix tsquery: "jan do" -> "jan:* & do:*"."""
+    terms = SEARCH_TERM.findall(q.lower())[:SEARCH_MAX_TERMS]
+    if not terms:
+        raise HTTPException(status_code=400, detail="Search text must contain a letter or digit.")
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def _score(trigram: bool, arg: str) -> str:
+    # Full-text rank, plus how closely the name matches the typed text when pg_trgm is there
+    rank = "ts_rank(search_vector, query)"
+    return f"({rank} + word_similarity({arg}, name))::real" if trigram else f"{rank}::real"
+
+
+def _match(trigram: bool, arg: str) -> str:
+    # name %> text is served by the name's gin_trgm_ops index, search_vector @@ query by its GIN index
+    return f"(search_vector @@ query OR name %> {arg})" if trigram else "search_vector @@ query"
+
+
+def _build_search_query(q: str, search_type: Optional[str], department_id: Optional[int], role: Optional[str],
+                        cursor: Optional[str], trigram: bool) -> Tuple[str, str, list]:
+    """
+    One ranked statement over both tables; results are ordered by (score DESC, type, id), which is
+    also the keyset of the cursor. Returns a shape name, the SQL and its arguments.
+    """
+    args: list = [_search_query(q)]
+    if trigram:
+        args.append(q)
+        text_arg = f"${len(args)}"
+    else:
+        text_arg = None
+
+    parts = []
+    if search_type in (None, "user"):
+        conditions = [_match(trigram, text_arg)]
+        if department_id is not None:
+            args.append(department_id)
+            conditions.append(f"department_id = ${len(args)}")
+        if role is not None:
+            args.append(role)
+            conditions.append(f"role = ${len(args)}")
+        parts.append(f"""
+            SELECT 'user'::text AS type, id, name, username AS detail, department_id, role,
+                   {_score(trigram, text_arg)} AS score
+            FROM users, to_tsquery('simple', $1) AS query
+            WHERE {' AND '.join(conditions)}
+        """)
+    # Departments have no role, so a role filter narrows the search to users
+    if search_type in (None, "department") and role is None:
+        conditions = [_match(trigram, text_arg)]
+        if department_id is not None:
+            args.append(department_id)
+            conditions.append(f"id = ${len(args)}")
+        parts.append(f"""
+            SELECT 'department'::text AS type, id, name, location AS detail, id AS department_id, NULL::text AS role,
+                   {_score(trigram, text_arg)} AS score
+            FROM departments, to_tsquery('simple', $1) AS query
+            WHERE {' AND '.join(conditions)}
+        """)
+    if not parts:
+        raise HTTPException(status_code=400, detail="Departments cannot be filtered by role.")
+
+    where = ""
+    if cursor:
+        values = decode_cursor(cursor)
+        if (len(values) != 3 or not isinstance(values[0], (int, float)) or values[1] not in SEARCH_TYPES
+                or not isinstance(values[2], int)):
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+        args.extend(values)
+        score, kind, last_id = (f"${len(args) - 2}", f"${len(args) - 1}", f"${len(args)}")
+        where = f" WHERE score < {score}::real OR (score = {score}::real AND (type, id) > ({kind}::text, {last_id}::int))"
+
+    shape = ",".join(
+        [search_type or "all"]
+        + (["department_id"] if department_id is not None else [])
+        + (["role"] if role is not None else [])
+        + (["cursor"] if cursor else [])
+        + (["trgm"] if trigram else [])
+    )
+    query = f"SELECT * FROM ({' UNION ALL '.join(parts)}) AS hits{where} ORDER BY score DESC, type, id"
+    return shape, query, args
+
+
+def _search_statement(q: str, search_type: Optional[str], department_id: Optional[int], role: Optional[str],
+                      cursor: Optional[str], trigram: bool) -> Tuple[Statement, list]:
+    """The registered statement of a search page and its arguments; the page size goes last."""
+    shape, query, args = _build_search_query(q, search_type, department_id, role, cursor, trigram)
+    return register_statement(f"search[{shape}]", f"{query} LIMIT ${len(args) + 1}", prepare=False), args
+
+
+# Each side of the search must be served by its GIN index (the pg_trgm variant adds the name index)
+for _search_type in SEARCH_TYPES:
+    _statement, _args = _search_statement("probe", _search_type, None, None, None, False)
+    hot_query(_statement, *_args, PAGE_SIZE_DEFAULT + 1)
+
+
+async def _has_trigram(db) -> bool:
+    global _trigram_available
+    if _trigram_available is None:
+        _trigram_available = bool(await db.fetchval("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+    return _trigram_available
+
+
+async def search_from_database(q: str, search_type: Optional[str] = None, department_id: Optional[int] = None,
+                               role: Optional[str] = None, limit: int = PAGE_SIZE_DEFAULT,
+                               cursor: Optional[str] = None) -> Dict:
+    async with connection() as db:
+        statement, args = _search_statement(q, search_type, department_id, role, cursor, await _has_trigram(db))
+
+        # Fetch one extra row to know whether another page exists
+        result = await statements.fetch(db, statement, *args, limit + 1)
+
+    has_more = len(result) > limit
+    items: List[Dict] = [dict(row) for row in result[:limit]]
+    last = items[-1] if items else None
+    return {
+        "items": items,
+        "next_cursor": encode_cursor([last["score"], last["type"], last["id"]]) if has_more else None,
+    }
@@ -1,81 +1,161 @@
 from fastapi import HTTPException
-from tools.database import Db
+from tools.database import connection, stream
+from tools import statements
+from tools.statements import Statement, register_statement, hot_query
+from tools.query_builder import UpdateBuilder
+from tools.pagination import encode_cursor, decode_cursor
+from tools.constant import PAGE_SIZE_DEFAULT, BULK_IMPORT_BATCH_SIZE
+import asyncpg
 from asyncpg import Record
+from pydantic import ValidationError
+from typing import Dict, List, Optional, Tuple
 
 from main.src.apis.models.user import User, UserCredentials,CreateUser,UpdateUser
 from datetime import datetime
-from tools.token import create_access_token, create_refresh_token,get_password_hash
-async def get_an_user_from_database(userid: int = None):
-    db = await Db()
+import logging
+from tools.token import create_access_token, create_refresh_token,get_password_hash_async,get_password_hashes_async
+
+logger = logging.getLogger(__name__)
 
-    result = await db.fetchrow("SELECT name, username, role FROM users WHERE id = $1", userid)
+# Hot statements, prepared once per pooled connection (see tools.statements)
+USER_BY_ID = hot_query(register_statement("user.get_by_id", "SELECT name, username, role FROM users WHERE id = $1"), 1)
+USER_VERIFY = hot_query(
+    register_statement("user.verify", "SELECT id, username, password, role FROM users WHERE username = $1"),
+    "probe@example.com",
+)
+
+# Columns written on registration, in the order of _user_insert_values
+USER_INSERT_COLUMNS = (
+    "name", "username", "password", "phone", "department", "employee_type",
+    "job_position", "company", "bank_name", "account_number", "bank_country",
+    "city", "state", "country", "postal_code", "department_id", "role", "shift_information", "reporting_manager",
+    "work_location", "work_type", "salary", "branch", "bank_address", "bank_code_1",
+    "bank_code_2", "address_line_1", "address_line_2", "district",
+)
+USER_INSERT = register_statement("user.insert", f"""
+    INSERT INTO users ({", ".join(USER_INSERT_COLUMNS)})
+    VALUES ({", ".join(f"${index}" for index in range(1, len(USER_INSERT_COLUMNS) + 1))})
+    ON CONFLICT (username) DO NOTHING
+    RETURNING id, name, username, role
+""")
+# Everything a bulk import batch could collide with, in one round trip: taken usernames and
+# phones, and which of the referenced departments exist (users_department_id_fkey)
+USER_IMPORT_CONFLICTS = hot_query(register_statement("user.import_conflicts", """
+    SELECT username, phone, NULL::int AS department_id
+    FROM users WHERE username = ANY($1::text[]) OR phone = ANY($2::text[])
+    UNION ALL
+    SELECT NULL, NULL, id FROM departments WHERE id = ANY($3::int[])
+"""), ["probe@example.com"], ["0000000000"], [1])
+# Moves COPY-loaded rows from the per-transaction scratch table; not prepared on connect since the table is temporary
+USER_IMPORT_MOVE = statements.adhoc_statement("user.bulk_insert", f"""
+    INSERT INTO users ({", ".join(USER_INSERT_COLUMNS)})
+    SELECT {", ".join(USER_INSERT_COLUMNS)} FROM users_import
+    ON CONFLICT DO NOTHING RETURNING id, username
+""")
+USER_UPDATE = UpdateBuilder(
+    "user.update", "users", UpdateUser.model_fields, "username",
+    returning="""id, username, phone, department, shift_information, employee_type, job_position, 
+                  reporting_manager, work_location, work_type, salary, company, bank_name, branch, 
+                  bank_address, bank_code_1, bank_code_2, account_number, bank_country, address_line_1, 
+                  address_line_2, city, district, state, country, postal_code, updated_at""",
+)
 
-    db.close()
+async def get_an_user_from_database(userid: int = None):
+    async with connection() as db:
+        result = await statements.fetchrow(db, USER_BY_ID, userid)
 
-    if not userid:
+    if not result:
         raise HTTPException(status_code=404, detail="User not found")
 
     return User(**result)
 
 
-async def get_all_users_from_database():
-    db = await Db()
-    result = await db.fetch("SELECT id,name, username, role FROM users")
-    db.close()
-    return [User(**user) for user in result]
+def _build_user_listing_query(columns: str, cursor: Optional[str], role: Optional[str],
+                              department_id: Optional[int]) -> Tuple[str, str, list]:
+    # Keyset pagination on id: filters first, then "id > last seen id".
+    # Also returns a shape name; there are only eight shapes, each one a registered statement.
+    conditions, args = [], []
+    if role is not None:
+        args.append(role)
+        conditions.append(f"role = ${len(args)}")
+    if department_id is not None:
+        args.append(department_id)
+        conditions.append(f"department_id = ${len(args)}")
+    if cursor:
+        last_id = decode_cursor(cursor)[0]
+        if not isinstance(last_id, int):
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+        args.append(last_id)
+        conditions.append(f"id > ${len(args)}")
+
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    shape = ",".join(condition.split(" ")[0] for condition in conditions) or "all"
+    return shape, f"SELECT {columns} FROM users{where} ORDER BY id", args
+
+
+def _user_listing_statement(cursor: Optional[str], role: Optional[str],
+                            department_id: Optional[int]) -> Tuple[Statement, list]:
+    """The registered statement of a listing page and its arguments; the page size goes last."""
+    shape, query, args = _build_user_listing_query("id, name, username, role", cursor, role, department_id)
+    return register_statement(f"user.list_page[{shape}]", f"{query} LIMIT ${len(args) + 1}", prepare=False), args
+
+
+# Filtered listings past the first page are the hot shapes; each must be served by its (filter, id) index
+for _role, _department_id in ((None, 1), ("user", None)):
+    _statement, _args = _user_listing_statement(encode_cursor([1]), _role, _department_id)
+    hot_query(_statement, *_args, PAGE_SIZE_DEFAULT + 1)
+
+
+async def get_all_users_from_database(limit: int = PAGE_SIZE_DEFAULT, cursor: Optional[str] = None,
+                                      role: Optional[str] = None, department_id: Optional[int] = None):
+    statement, args = _user_listing_statement(cursor, role, department_id)
+
+    # Fetch one extra row to know whether another page exists
+    async with connection() as db:
+        result = await statements.fetch(db, statement, *args, limit + 1)
+
+    has_more = len(result) > limit
+    result = result[:limit]
+    return {
+        # Plain dicts shaped like User: the listing is serialized without a model per row
+        "items": [{"name": user["name"], "username": user["username"], "role": user["role"]} for user in result],
+        "next_cursor": encode_cursor([result[-1]["id"]]) if has_more else None,
+    }
+
+
+def stream_users_from_database(cursor: Optional[str] = None, role: Optional[str] = None,
+                               department_id: Optional[int] = None):
+    """Iterate over every matching user through a server-side cursor."""
+    _, query, args = _build_user_listing_query("name, username, role", cursor, role, department_id)
+    return stream(query, *args)
 
 async def verify_user(username):
-    db = await Db()
-    result = await db.fetchrow("SELECT id, username, password FROM users WHERE username = $1", username)
-    await db.close()  # Don't forget to close the database connection
-    return result
+    async with connection() as db:
+        return await statements.fetchrow(db, USER_VERIFY, username)
 
 
-async def create_user_service(user: CreateUser):
-    # Initialize database connection
-    db = await Db()
+def _user_insert_values(user: CreateUser, hashed_password: str) -> tuple:
+    return (user.name, user.username, hashed_password, user.phone, user.department, user.employee_type,
+            user.job_position, user.company, user.bank_name, user.account_number, user.bank_country,
+            user.city, user.state, user.country, user.postal_code, int(user.department_id), user.role, user.shift_information, user.reporting_manager,
+            user.work_location, user.work_type, user.salary, user.branch, user.bank_address, user.bank_code_1,
+            user.bank_code_2, user.address_line_1, user.address_line_2, user.district)
 
-    # Check if the username already exists in the database
-    query_check = "SELECT id FROM users WHERE username = $1"
-    existing_user = await db.fetchrow(query_check, user.username)
 
-    # If the username exists, raise an exception
-    if existing_user:
-        db.close()
-        return {"message": "Username already exists. Please login."}
-    
-    query_check = "SELECT id FROM users WHERE phone = $1"
-    existing_user_phone = await db.fetchrow(query_check, user.phone)
+async def create_user_service(user: CreateUser):
+    # Hash the password on the worker pool before borrowing a database connection
+    hashed_password = await get_password_hash_async(user.password)
 
-    # If the username exists, raise an exception
-    if existing_user_phone:
-        db.close()
+    # A single statement: the username unique index resolves duplicates via ON CONFLICT,
+    # a duplicate phone number surfaces as a unique violation on its own index
+    try:
+        async with connection() as db:
+            result = await statements.fetchrow(db, USER_INSERT, *_user_insert_values(user, hashed_password))
+    except asyncpg.UniqueViolationError:
         return {"message": "Phone Number already exists. Please login."}
 
-    # Hash the password using the method in CreateUser model
-    hashed_password = get_password_hash(user.password)
-
-    # Insert the new user into the database with hashed password
-    query = """
-    INSERT INTO users (name, username, password, phone, department, employee_type, 
-            job_position, company, bank_name, account_number, bank_country, 
-            city, state, country, postal_code, department_id, role, shift_information, reporting_manager, 
-            work_location, work_type, salary, branch, bank_address, bank_code_1, 
-            bank_code_2, address_line_1, address_line_2, district) 
-    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, $19, $20, $21, $22, $23, $24, $25, $26, $27,$28,$29) 
-    RETURNING id, name, username, role;
-    """
-    result = await db.fetchrow(query, user.name, user.username, hashed_password, user.phone, user.department, user.employee_type,
-                               user.job_position, user.company, user.bank_name, user.account_number, user.bank_country,
-                               user.city, user.state, user.country, user.postal_code, int(user.department_id), user.role, user.shift_information, user.reporting_manager,
-                               user.work_location, user.work_type, user.salary, user.branch, user.bank_address, user.bank_code_1,
-                               user.bank_code_2, user.address_line_1, user.address_line_2, user.district)
-
-    if not result:
-        db.close()
-        raise HTTPException(status_code=500, detail="User registration failed.")
-    
-    
+    if result is None:
+        return {"message": "Username already exists. Please login."}
 
     # Prepare user data for token creation
     user_data = {
@@ -88,8 +168,6 @@ async def create_user_service(user: CreateUser):
     access_token = create_access_token(data=user_data)
     refresh_token = create_refresh_token(data=user_data)
 
-    db.close()
-
     # Return user details along with the tokens
     return {
         "user": {
@@ -101,35 +179,151 @@ async def create_user_service(user: CreateUser):
         "refresh_token": refresh_token
     }
 
+def _import_error(row: int, errors: List[str]) -> dict:
+    return {"row": row, "status": "error", "errors": errors}
+
+
+async def _bulk_insert_users(records: List[tuple]) -> Dict[str, int]:
+    # COPY into a scratch table, then move rows over with ON CONFLICT so a concurrent
+    # registration of the same username or phone skips that row instead of failing the batch
+    async with connection() as db:
+        async with db.transaction():
+            await db.execute(
+                f"CREATE TEMP TABLE users_import ON COMMIT DROP AS "
+                f"SELECT {', '.join(USER_INSERT_COLUMNS)} FROM users WITH NO DATA"
+            )
+            await db.copy_records_to_table("users_import", records=records, columns=USER_INSERT_COLUMNS)
+            inserted = await statements.fetch(db, USER_IMPORT_MOVE)
+    return {row["username"]: row["id"] for row in inserted}
+
+
+async def _insert_users_one_by_one(records: List[tuple]) -> Tuple[Dict[str, int], Dict[str, str]]:
+    """
+    Fallback for a batch the database rejected as a whole: insert each row in its own
+    transaction so only the offending rows fail. Returns (inserted ids, errors) by username.
+    """
+    inserted, errors = {}, {}
+    async with connection() as db:
+        for record in records:
+            username = record[USER_INSERT_COLUMNS.index("username")]
+            try:
+                async with db.transaction():
+                    row = await statements.fetchrow(db, USER_INSERT, *record)
+            except (asyncpg.DataError, asyncpg.IntegrityConstraintViolationError) as e:
+                errors[username] = f"Rejected by the database: {e.message}"
+                continue
+            if row is not None:
+                inserted[username] = row["id"]
+    return inserted, errors
+
+
+async def bulk_import_users_service(rows: List[dict]):
+    """
+    Register many users at once and report the outcome of every row (numbered from 1).
+    Each batch is validated, checked for duplicates with one query, hashed in parallel and loaded with COPY.
+    """
+    report = []
+    created = 0
+    seen_usernames, seen_phones = set(), set()
+
+    for start in range(0, len(rows), BULK_IMPORT_BATCH_SIZE):
+        # Validate the batch and drop duplicates inside the import itself
+        candidates = []
+        for row_number, raw in enumerate(rows[start:start + BULK_IMPORT_BATCH_SIZE], start=start + 1):
+            try:
+                user = CreateUser.model_validate(raw)
+            except ValidationError as e:
+                report.append(_import_error(row_number, [
+                    f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+                ]))
+                continue
+            except (AttributeError, TypeError, ValueError) as e:
+                report.append(_import_error(row_number, [str(e)]))
+                continue
+
+            if user.username in seen_usernames:
+                report.append(_import_error(row_number, ["Duplicate username in import."]))
+            elif user.phone in seen_phones:
+                report.append(_import_error(row_number, ["Duplicate phone number in import."]))
+            else:
+                seen_usernames.add(user.username)
+                seen_phones.add(user.phone)
+                candidates.append((row_number, user))
+
+        if not candidates:
+            continue
+
+        # One set-based uniqueness and department check for the whole batch
+        async with connection() as db:
+            conflicts = await statements.fetch(
+                db, USER_IMPORT_CONFLICTS,
+                [user.username for _, user in candidates],
+                [user.phone for _, user in candidates],
+                list({int(user.department_id) for _, user in candidates}),
+            )
+        taken_usernames = {row["username"] for row in conflicts if row["username"] is not None}
+        taken_phones = {row["phone"] for row in conflicts if row["phone"] is not None}
+        known_departments = {row["department_id"] for row in conflicts if row["department_id"] is not None}
+
+        to_insert = []
+        for row_number, user in candidates:
+            if user.username in taken_usernames:
+                report.append(_import_error(row_number, ["Username already exists."]))
+            elif user.phone in taken_phones:
+                report.append(_import_error(row_number, ["Phone Number already exists."]))
+            elif int(user.department_id) not in known_departments:
+                report.append(_import_error(row_number, [f"Department {user.department_id} does not exist."]))
+            else:
+                to_insert.append((row_number, user))
+
+        if not to_insert:
+            continue
+
+        hashed_passwords = await get_password_hashes_async([user.password for _, user in to_insert])
+        records = [
+            _user_insert_values(user, hashed_password)
+            for (_, user), hashed_password in zip(to_insert, hashed_passwords)
+        ]
+        rejected = {}
+        try:
+            inserted = await _bulk_insert_users(records)
+        except (asyncpg.DataError, asyncpg.IntegrityConstraintViolationError) as e:
+            # e.g. a department deleted since the check; the batch rolled back, find the rows at fault
+            logger.warning("Bulk import batch from row %s rejected, retrying row by row: %s", to_insert[0][0], e)
+            inserted, rejected = await _insert_users_one_by_one(records)
+
+        for row_number, user in to_insert:
+            user_id = inserted.get(user.username)
+            if user.username in rejected:
+                report.append(_import_error(row_number, [rejected[user.username]]))
+            elif user_id is None:
+                report.append(_import_error(row_number, ["Username or phone number already exists."]))
+            else:
+                created += 1
+                report.append({"row": row_number, "status": "created", "id": user_id, "username": user.username})
+
+    report.sort(key=lambda item: item["row"])
+    return {
+        "total": len(rows),
+        "created": created,
+        "failed": len(rows) - created,
+        "rows": report,
+    }
+
+
 async def update_user_service(username: str, user_data: UpdateUser):
     
     try:
-        db = await Db()  # Initialize database connection
-        
         # Filter fields dynamically based on input
-        fields_to_update = {key: value for key, value in user_data.dict().items() if value is not None}
-        
-        if not fields_to_update:
-            raise HTTPException(status_code=400, detail="No fields provided to update.")
-
-        # Build dynamic query
-        set_clauses = ", ".join([f"{field} = ${index}" for index, field in enumerate(fields_to_update.keys(), start=1)])
-        query = f"""
-        UPDATE users
-        SET {set_clauses}, updated_at = CURRENT_TIMESTAMP
-        WHERE username = ${len(fields_to_update) + 1}
-        RETURNING id, username, phone, department, shift_information, employee_type, job_position, 
-                  reporting_manager, work_location, work_type, salary, company, bank_name, branch, 
-                  bank_address, bank_code_1, bank_code_2, account_number, bank_country, address_line_1, 
-                  address_line_2, city, district, state, country, postal_code, updated_at;
-        """
-        
-        # Prepare query values
-        values = list(fields_to_update.values()) + [username]
+        fields_to_update = user_data.model_dump(exclude_none=True)
+
+        # Whitelisted, cached UPDATE statement for this set of columns
+        statement, values = USER_UPDATE.build(fields_to_update, username)
 
         # Execute the query
-        async with db.transaction():
-            updated_user: Record = await db.fetchrow(query, *values)
+        async with connection() as db:
+            async with db.transaction():
+                updated_user: Record = await statements.fetchrow(db, statement, *values)
 
         if not updated_user:
             raise HTTPException(status_code=404, detail="User not found or update failed.")
@@ -139,6 +333,8 @@ async def update_user_service(username: str, user_data: UpdateUser):
             "user": dict(updated_user)  # Convert Record object to dict
         }
 
-    except Exception as e:
-        print(f"Error while updating user: {e}")
-        raise HTTPException(status_code=500, detail="An error occurred while updating the user.")
\ No newline at end of file
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Error while updating user %s", username)
+        raise HTTPException(status_code=500, detail="An error occurred while updating the user.")
@@ -1,19 +1,30 @@
-from fastapi import APIRouter, HTTPException, Depends
-from main.src.apis.models.department import Department
-from tools.token import validate_access_token, get_bearer_token
-from tools.middleware import role_required
+import logging
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from main.src.apis.models.department import Department, DepartmentPage, UpdateDepartment, DepartmentBatch
+from tools.middleware import Principal, get_principal, role_required
+from tools.pagination import ndjson_stream, shaped_response
+from tools.constant import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
 
-from typing import Dict
+from typing import Optional
 from main.src.apis.database.department import (
     get_a_department_from_database,
     get_all_departments_from_database,
+    stream_departments_from_database,
     create_department_service,
     update_department_service,
-    delete_department_service
+    delete_department_service,
+    batch_department_service
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/department", tags=["DEPARTMENT"])
 
+# Roles allowed to create / delete departments
+CREATE_ROLES = frozenset({"department_maker", "super_admin"})
+DELETE_ROLES = frozenset({"department_admin", "super_admin"})
+
 # Add middleware for role-based access control
 
 # Route to fetch a single department by ID
@@ -28,18 +39,29 @@ async def get_department(department_id: int):
     return department
 
 
-# Route to fetch all departments
-@router.get("/get-all-departments")
-async def get_all_departments():
+# Route to fetch departments page by page
+@router.get("/get-all-departments", response_model=DepartmentPage)
+async def get_all_departments(
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Continuation token from the previous page"),
+    sort: str = Query("id", description="id, name or created_at; prefix with '-' for descending"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return; id and the sort column are always included"),
+    stream: bool = Query(False, description="Stream every department as NDJSON instead of one page"),
+):
     """
-    Fetch all departments
+    Fetch departments, one keyset-paginated page at a time
     """
-    return await get_all_departments_from_database()
+    if stream:
+        return StreamingResponse(
+            ndjson_stream(stream_departments_from_database(cursor, sort, fields)),
+            media_type="application/x-ndjson",
+        )
+    return shaped_response(await get_all_departments_from_database(limit, cursor, sort, fields))
 
 
 # Route to create a new department (requires specific roles)
 @router.post("/create-department")
-async def create_department(department: Department, user=Depends(role_required(["department_maker", "super_admin"]))):
+async def create_department(department: Department, user=Depends(role_required(CREATE_ROLES))):
     """
     Create a new department
     """
@@ -53,35 +75,46 @@ async def create_department(department: Department, user=Depends(role_required([
 @router.put("/update-department/{department_id}")
 async def update_department(
     department_id: int,
-    department_data: Dict,
-    token: str = Depends(get_bearer_token)
+    department_data: UpdateDepartment,
+    principal: Principal = Depends(get_principal)
 ):
     """
     Update an existing department
     """
     try:
-        # Validate the token
-        payload = validate_access_token(token)
-        print(f"Decoded Token: {payload}")
-
         # Call the service to update the department
         updated_department = await update_department_service(department_id, department_data)
         return updated_department
 
     except HTTPException as e:
         raise e
-    except Exception as e:
-        print(f"Unexpected Error: {str(e)}")
+    except Exception:
+        logger.exception("Unexpected error while updating department %s", department_id)
         raise HTTPException(status_code=500, detail="An unexpected error occurred.")
 
 
 # Route to delete a department by ID (requires specific roles)
 @router.delete("/delete-department/{department_id}")
-async def delete_department(department_id: int, user=Depends(role_required(["department_admin", "super_admin"]))):
+async def delete_department(department_id: int, user=Depends(role_required(DELETE_ROLES))):
     """
     Delete a department by ID
     """
     try:
         return await delete_department_service(department_id)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error deleting department: ")
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=f"Error deleting department: ")
+
+
+# Route to create, update and delete many departments in one transaction
+@router.post("/batch")
+async def batch_departments(batch: DepartmentBatch, principal: Principal = Depends(get_principal)):
+    """
+    Apply a batch of department creates, partial updates and deletes atomically; returns per-item results
+    """
+    # Same role rules as the single-item routes
+    if batch.create and not principal.has_role(CREATE_ROLES):
+        raise HTTPException(status_code=403, detail="You are not authorized to create departments.")
+    if batch.delete and not principal.has_role(DELETE_ROLES):
+        raise HTTPException(status_code=403, detail="You are not authorized to delete departments.")
+
+    return await batch_department_service(batch)
@@ -0,0 +1,25 @@
+from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
+from tools.database import check_ready
+
+router = APIRouter(prefix="/health", tags=["HEALTH"])
+
+
+# Liveness: the worker process is up and its event loop responds
+@router.get("/live")
+async def live():
+    """
+    Always 200 while the worker runs
+    """
+    return {"status": "alive"}
+
+
+# Readiness: route traffic here only once the database pool is warm
+@router.get("/ready")
+async def ready():
+    """
+    200 once this worker's pool is open and the database answers, 503 before that and during shutdown
+    """
+    if await check_ready():
+        return {"status": "ready"}
+    return ORJSONResponse({"status": "not ready"}, status_code=503)
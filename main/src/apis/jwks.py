@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
+from tools.keys import public_jwks
+from tools.constant import JWKS_CACHE_TTL
+
+router = APIRouter(tags=["AUTH"])
+
+
+# Public keys for verifying access tokens without calling back into this app
+@router.get("/.well-known/jwks.json")
+async def get_jwks():
+    """
+    JSON Web Key Set of every access-token signing key (empty while tokens are HMAC-signed)
+    """
+    return ORJSONResponse(public_jwks(), headers={"Cache-Control": f"public, max-age={JWKS_CACHE_TTL}"})
@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from tools import metrics
+
+router = APIRouter(tags=["METRICS"])
+
+
+# Prometheus scrape endpoint, kept out of the OpenAPI docs
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    Request, database and auth metrics of this worker process in Prometheus text format
+    """
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field, EmailStr, field_validator
-from typing import Optional
+from typing import Optional, List, Dict, Any
+from tools.constant import DEPARTMENT_BATCH_MAX_ITEMS
 
 class Department(BaseModel):
     name: str = Field(..., min_length=1, max_length=50, description="Unique department code")
@@ -37,4 +38,44 @@ class Department(BaseModel):
     def validate_manager_id(cls, value):
         if value is not None and value <= 0:
             raise ValueError("Manager ID must be a positive integer.")
-        return value
\ No newline at end of file
+        return value
+
+class UpdateDepartment(BaseModel):
+    name: Optional[str] = Field(None, min_length=1, max_length=50)
+    description: Optional[str] = None
+    manager_id: Optional[int] = None
+    location: Optional[str] = Field(None, min_length=1, max_length=225)
+    phone: Optional[str] = Field(None, min_length=1, max_length=50)
+    email: Optional[EmailStr] = None
+
+    # Same rules as Department, applied only to the fields being changed
+    @field_validator("phone", mode="before")
+    def validate_phone_number(cls, value):
+        if value is None:
+            return value
+        return Department.validate_phone_number(value)
+
+    @field_validator("location", mode="before")
+    def validate_location(cls, value):
+        if value is None:
+            return value
+        return Department.validate_location(value)
+
+    @field_validator("manager_id", mode="before")
+    def validate_manager_id(cls, value):
+        return Department.validate_manager_id(value)
+
+
+class DepartmentPage(BaseModel):
+    items: List[Dict[str, Any]] = Field(..., description="Department rows limited to the requested fields")
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to fetch the next page; null on the last page")
+
+
+class DepartmentBatchUpdate(UpdateDepartment):
+    id: int = Field(..., description="ID of the department to update")
+
+
+class DepartmentBatch(BaseModel):
+    create: List[Department] = Field(default_factory=list, max_length=DEPARTMENT_BATCH_MAX_ITEMS)
+    update: List[DepartmentBatchUpdate] = Field(default_factory=list, max_length=DEPARTMENT_BATCH_MAX_ITEMS)
+    delete: List[int] = Field(default_factory=list, max_length=DEPARTMENT_BATCH_MAX_ITEMS, description="IDs to delete")
@@ -0,0 +1,29 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class OrgMember(BaseModel):
+    id: int
+    name: str
+    username: str
+    job_position: Optional[str] = None
+    department_id: Optional[int] = None
+    role: str
+    manager_id: Optional[int] = Field(None, description="User ID resolved from reporting_manager")
+    depth: int = Field(..., description="Levels below the subtree root, or above the starting user in a chain")
+
+
+class OrgSubtree(BaseModel):
+    items: List[OrgMember] = Field(..., description="The root and everyone under them, depth-first")
+    truncated: bool = Field(..., description="True when the subtree had more members than were returned")
+
+
+class OrgChain(BaseModel):
+    items: List[OrgMember] = Field(..., description="The user, their manager, and so on up to the top")
+
+
+class DepartmentHeadcount(BaseModel):
+    id: int
+    name: str
+    manager_id: Optional[int] = None
+    headcount: int
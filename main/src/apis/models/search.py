@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+
+class SearchHit(BaseModel):
+    type: Literal["user", "department"]
+    id: int
+    name: str
+    detail: Optional[str] = Field(None, description="Username of a user, location of a department")
+    department_id: Optional[int] = None
+    role: Optional[str] = None
+    score: float = Field(..., description="Relevance; results are ordered by it, best first")
+
+
+class SearchPage(BaseModel):
+    items: List[SearchHit]
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to fetch the next page; null on the last page")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, EmailStr, field_validator
-from typing import Optional
+from typing import Optional, List
 
 
 
@@ -8,46 +8,53 @@ class User(BaseModel):
     username: str
     role: str
 
+class UserPage(BaseModel):
+    items: List[User]
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to fetch the next page; null on the last page")
+
 class UserCredentials(BaseModel):
     username: str
     password: str
 
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = Field(None, description="Refresh token to revoke along with the access token")
+
 
 class CreateUser(BaseModel):
     # Required fields
     name: str = Field(..., min_length=2, max_length=100, description="User's full name")
-    username: EmailStr = Field(..., description="User's email address")
+    username: EmailStr = Field(..., max_length=255, description="User's email address")
     password: str = Field(..., min_length=8, description="Password with at least 8 characters")
    
 
     # Fields that are now required
-    phone: str = Field(..., description="User's phone number")
-    department: str = Field(..., description="Department of the user")
-    employee_type: str = Field(..., description="Type of employee (e.g., permanent, contract)")
-    job_position: str = Field(..., description="Job position of the user")
-    company: str = Field(..., description="Company name")
-    bank_name: str = Field(..., description="Bank name")
-    account_number: str = Field(..., description="Bank account number")
-    bank_country: str = Field(..., description="Bank country")
-    city: str = Field(..., description="City")
-    state: str = Field(..., description="State")
-    country: str = Field(..., description="Country")
-    postal_code: str = Field(..., description="Postal code")
-    department_id: str = Field(..., description="Department id code")
-    role: str = Field(default="user", description="Role of the user (default: user)")
+    phone: str = Field(..., max_length=20, description="User's phone number")
+    department: str = Field(..., max_length=100, description="Department of the user")
+    employee_type: str = Field(..., max_length=50, description="Type of employee (e.g., permanent, contract)")
+    job_position: str = Field(..., max_length=100, description="Job position of the user")
+    company: str = Field(..., max_length=100, description="Company name")
+    bank_name: str = Field(..., max_length=100, description="Bank name")
+    account_number: str = Field(..., max_length=50, description="Bank account number")
+    bank_country: str = Field(..., max_length=100, description="Bank country")
+    city: str = Field(..., max_length=100, description="City")
+    state: str = Field(..., max_length=100, description="State")
+    country: str = Field(..., max_length=100, description="Country")
+    postal_code: str = Field(..., max_length=20, description="Postal code")
+    department_id: str = Field(..., max_length=10, description="Department id code")
+    role: str = Field(default="user", max_length=50, description="Role of the user (default: user)")
     # Optional fields
-    shift_information: Optional[str] = None
-    reporting_manager: Optional[str] = None
-    work_location: Optional[str] = None
-    work_type: Optional[str] = None
-    salary: Optional[str] = None
-    branch: Optional[str] = None
-    bank_address: Optional[str] = None
-    bank_code_1: Optional[str] = None
-    bank_code_2: Optional[str] = None
-    address_line_1: Optional[str] = None
-    address_line_2: Optional[str] = None
-    district: Optional[str] = None
+    shift_information: Optional[str] = Field(None, max_length=100)
+    reporting_manager: Optional[str] = Field(None, max_length=100)
+    work_location: Optional[str] = Field(None, max_length=100)
+    work_type: Optional[str] = Field(None, max_length=50)
+    salary: Optional[str] = Field(None, max_length=50)
+    branch: Optional[str] = Field(None, max_length=100)
+    bank_address: Optional[str] = Field(None, max_length=255)
+    bank_code_1: Optional[str] = Field(None, max_length=50)
+    bank_code_2: Optional[str] = Field(None, max_length=50)
+    address_line_1: Optional[str] = Field(None, max_length=255)
+    address_line_2: Optional[str] = Field(None, max_length=255)
+    district: Optional[str] = Field(None, max_length=100)
     
 
     # Password validation
@@ -77,6 +84,8 @@ class CreateUser(BaseModel):
         if not value_str.isdigit():
             field_name = info.field_name.replace('_', ' ').title()  # Use info.field_name
             raise ValueError(f"{field_name} must contain only numbers.")
+        if info.field_name == "department_id" and int(value_str) > 2147483647:
+            raise ValueError("Department Id is out of range.")
         return value_str  # Return as a string to avoid further issues
 
     # Alphabetic field validation
@@ -88,27 +97,27 @@ class CreateUser(BaseModel):
         return value
     
 class UpdateUser(BaseModel):
-    phone: Optional[str] = None
-    department: Optional[str] = None
-    shift_information: Optional[str] = None
-    employee_type: Optional[str] = None
-    job_position: Optional[str] = None
-    reporting_manager: Optional[str] = None
-    work_location: Optional[str] = None
-    work_type: Optional[str] = None
-    salary: Optional[str] = None
-    company: Optional[str] = None
-    bank_name: Optional[str] = None
-    branch: Optional[str] = None
-    bank_address: Optional[str] = None
-    bank_code_1: Optional[str] = None
-    bank_code_2: Optional[str] = None
-    account_number: Optional[str] = None
-    bank_country: Optional[str] = None
-    address_line_1: Optional[str] = None
-    address_line_2: Optional[str] = None
-    city: Optional[str] = None
-    district: Optional[str] = None
-    state: Optional[str] = None
-    country: Optional[str] = None
-    postal_code: Optional[str] = None
+    phone: Optional[str] = Field(None, max_length=20)
+    department: Optional[str] = Field(None, max_length=100)
+    shift_information: Optional[str] = Field(None, max_length=100)
+    employee_type: Optional[str] = Field(None, max_length=50)
+    job_position: Optional[str] = Field(None, max_length=100)
+    reporting_manager: Optional[str] = Field(None, max_length=100)
+    work_location: Optional[str] = Field(None, max_length=100)
+    work_type: Optional[str] = Field(None, max_length=50)
+    salary: Optional[str] = Field(None, max_length=50)
+    company: Optional[str] = Field(None, max_length=100)
+    bank_name: Optional[str] = Field(None, max_length=100)
+    branch: Optional[str] = Field(None, max_length=100)
+    bank_address: Optional[str] = Field(None, max_length=255)
+    bank_code_1: Optional[str] = Field(None, max_length=50)
+    bank_code_2: Optional[str] = Field(None, max_length=50)
+    account_number: Optional[str] = Field(None, max_length=50)
+    bank_country: Optional[str] = Field(None, max_length=100)
+    address_line_1: Optional[str] = Field(None, max_length=255)
+    address_line_2: Optional[str] = Field(None, max_length=255)
+    city: Optional[str] = Field(None, max_length=100)
+    district: Optional[str] = Field(None, max_length=100)
+    state: Optional[str] = Field(None, max_length=100)
+    country: Optional[str] = Field(None, max_length=100)
+    postal_code: Optional[str] = Field(None, max_length=20)
@@ -0,0 +1,43 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
+from main.src.apis.models.org import OrgSubtree, OrgChain, DepartmentHeadcount
+from main.src.apis.database.org import (
+    get_org_subtree_from_database,
+    get_org_chain_from_database,
+    get_department_headcount_from_database,
+)
+from tools.constant import ORG_MAX_DEPTH, ORG_SUBTREE_MAX_ROWS
+from tools.middleware import get_principal
+from tools.pagination import shaped_response
+
+# Reporting lines and headcounts are internal data: every org endpoint needs a valid access token
+router = APIRouter(prefix="/api/org", tags=["ORG"], dependencies=[Depends(get_principal)])
+
+
+@router.get("/subtree/{user_id}", response_model=OrgSubtree)
+async def get_org_subtree(
+    user_id: int,
+    max_depth: Optional[int] = Query(None, ge=0, le=ORG_MAX_DEPTH, description="Levels below the user to include (default: all)"),
+    limit: int = Query(ORG_SUBTREE_MAX_ROWS, ge=1, le=ORG_SUBTREE_MAX_ROWS, description="Most members to return"),
+):
+    """
+    Fetch a user and everyone reporting to them, directly or indirectly, depth-first.
+    A subtree larger than `limit` is cut level by level, keeping the members closest to the user.
+    """
+    return shaped_response(await get_org_subtree_from_database(user_id, max_depth, limit))
+
+
+@router.get("/chain/{user_id}", response_model=OrgChain)
+async def get_org_chain(user_id: int):
+    """
+    Fetch the reporting chain from a user up to the top of the organization
+    """
+    return shaped_response(await get_org_chain_from_database(user_id))
+
+
+@router.get("/headcount", response_model=List[DepartmentHeadcount])
+async def get_department_headcount(department_id: Optional[int] = None):
+    """
+    Count the users of every department, or of a single one
+    """
+    return shaped_response(await get_department_headcount_from_database(department_id))
@@ -0,0 +1,24 @@
+from typing import Literal, Optional
+from fastapi import APIRouter, Query
+from main.src.apis.models.search import SearchPage
+from main.src.apis.database.search import search_from_database
+from tools.constant import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+from tools.pagination import shaped_response
+
+router = APIRouter(prefix="/api/search", tags=["SEARCH"])
+
+
+@router.get("", response_model=SearchPage)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200, description="Words or word prefixes to look for"),
+    type: Optional[Literal["user", "department"]] = Query(None, description="Search only users or only departments"),
+    department_id: Optional[int] = None,
+    role: Optional[str] = Query(None, description="Only users with this role"),
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Continuation token from the previous page"),
+):
+    """
+    Search users (name, username, job position, city) and departments (name, description, location),
+    best matches first, one page at a time
+    """
+    return shaped_response(await search_from_database(q, type, department_id, role, limit, cursor))
@@ -1,15 +1,27 @@
-from fastapi import APIRouter, HTTPException,Depends
-from main.src.apis.models.user import User,UpdateUser
+import csv
+import io
+import logging
+import orjson
+from fastapi import APIRouter, HTTPException,Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from main.src.apis.models.user import User,UpdateUser,UserPage
 from main.src.apis.database.user import (
     get_an_user_from_database,
     get_all_users_from_database,
+    stream_users_from_database,
+    bulk_import_users_service,
     update_user_service
 )
-from tools.token import validate_access_token,get_bearer_token
+from tools.pagination import ndjson_stream, shaped_response
+from tools.constant import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX, BULK_IMPORT_MAX_ROWS
+from tools.middleware import Principal, get_principal, role_required
 from fastapi import APIRouter, HTTPException
 
 
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/user", tags=["USERS"])
 
 
@@ -24,38 +36,90 @@ async def get_user(userid: int = None):
     return user_data
 
 
-@router.get("/get-all-users", response_model=list[User])
-async def get_all_users():
+@router.get("/get-all-users", response_model=UserPage)
+async def get_all_users(
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Continuation token from the previous page"),
+    role: Optional[str] = None,
+    department_id: Optional[int] = None,
+    stream: bool = Query(False, description="Stream every matching user as NDJSON instead of one page"),
+):
     """
-    Get all users from the database
+    Get users from the database, one keyset-paginated page at a time
     """
-    return await get_all_users_from_database()
+    if stream:
+        return StreamingResponse(
+            ndjson_stream(stream_users_from_database(cursor, role, department_id)),
+            media_type="application/x-ndjson",
+        )
+    return shaped_response(await get_all_users_from_database(limit, cursor, role, department_id))
 
 
 @router.put("/update")
 async def update_user(
     user: UpdateUser,
-    token: str = Depends(get_bearer_token)
+    principal: Principal = Depends(get_principal)
 ):
     """
-    Updates a user's details after validating the JWT token.
+    Updates the details of the authenticated user.
     """
     try:
-        # Validate the token
-        payload = validate_access_token(token)
-        print(f"Decoded Token: {payload}")
-
-        # Extract username from the token payload
-        username = payload.get("username")
-        if not username:
-            raise HTTPException(status_code=401, detail="Invalid token payload. Username not found.")
-
         # Call the service to update the user
-        result = await update_user_service(username, user)
+        result = await update_user_service(principal.username, user)
         return result
     
     except HTTPException as e:
         raise e
-    except Exception as e:
-        print(f"Unexpected Error: {str(e)}")
-        raise HTTPException(status_code=500, detail="An unexpected error occurred.")
\ No newline at end of file
+    except Exception:
+        logger.exception("Unexpected error while updating user")
+        raise HTTPException(status_code=500, detail="An unexpected error occurred.")
+
+
+async def read_import_rows(request: Request) -> List[dict]:
+    """
+    Parse a CSV (header row required) or NDJSON request body into one dict per user.
+    Empty CSV cells are treated as missing fields.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    body = (await request.body()).decode("utf-8-sig")
+
+    if content_type in ("text/csv", "application/csv"):
+        rows = [
+            {key: value for key, value in row.items() if key and value not in ("", None)}
+            for row in csv.DictReader(io.StringIO(body))
+        ]
+    elif content_type in ("application/x-ndjson", "application/jsonl"):
+        rows = []
+        for line_number, line in enumerate(body.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                rows.append(orjson.loads(line))
+            except orjson.JSONDecodeError:
+                raise HTTPException(status_code=400, detail=f"Invalid JSON on line {line_number}.")
+    else:
+        raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson.")
+
+    if len(rows) > BULK_IMPORT_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_IMPORT_MAX_ROWS} users per import.")
+    return rows
+
+
+@router.post(
+    "/bulk-import",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "text/csv": {"schema": {"type": "string"}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def bulk_import_users(request: Request, user=Depends(role_required({"super_admin"}))):
+    """
+    Register many users from a CSV or NDJSON body of CreateUser records; returns a per-row report
+    """
+    rows = await read_import_rows(request)
+    return await bulk_import_users_service(rows)
@@ -0,0 +1,53 @@
+"""
+Schema migrations for the ERP database.
+
+    python migrate.py              # apply pending migrations
+    python migrate.py --target 1   # apply up to version 1
+    python migrate.py status       # list migrations and when they were applied
+    python migrate.py explain      # check that hot-path queries can use an index
+"""
+import argparse
+import asyncio
+import importlib
+import json
+
+import asyncpg
+from tools import constant as const
+from tools.migrations import migrate, migration_status, explain_hot_queries
+
+# Modules whose statements are checked by `explain` (they mark them with tools.statements.hot_query)
+DATABASE_MODULES = ("user", "department", "org", "search")
+
+
+async def main(command: str, target: int = None) -> int:
+    db = await asyncpg.connect(const.DATABASE_URL)
+    try:
+        if command == "status":
+            for migration in await migration_status(db):
+                state = migration["applied_at"] or "pending"
+                print(f"{migration['version']:04d}_{migration['name']}: {state}")
+            return 0
+
+        if command == "explain":
+            for name in DATABASE_MODULES:
+                importlib.import_module(f"main.src.apis.database.{name}")
+            report = await explain_hot_queries(db)
+            print(json.dumps(report, indent=2))
+            return 0 if all(entry["uses_index"] for entry in report.values()) else 1
+
+        applied = await migrate(db, target)
+        for migration in applied:
+            print(f"Applied {migration.version:04d}_{migration.name}")
+        if not applied:
+            print("Schema is up to date.")
+        return 0
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ERP schema migrations")
+    parser.add_argument("command", nargs="?", default="upgrade", choices=["upgrade", "status", "explain"])
+    parser.add_argument("--target", type=int, default=None, help="Highest migration version to apply")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(main(args.command, args.target)))
@@ -0,0 +1,66 @@
+-- Base tables used by main/src/apis/database/*.
+-- users.department_id and departments.manager_id reference each other, so the
+-- foreign keys are added once both tables exist.
+
+CREATE TABLE IF NOT EXISTS users (
+    id                SERIAL PRIMARY KEY,
+    name              VARCHAR(100) NOT NULL,
+    username          VARCHAR(255) NOT NULL,
+    password          TEXT NOT NULL,
+    phone             VARCHAR(20),
+    status            VARCHAR(20) NOT NULL DEFAULT 'active',
+    created_at        TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at        TIMESTAMP,
+    department        VARCHAR(100),
+    shift_information VARCHAR(100),
+    employee_type     VARCHAR(50),
+    job_position      VARCHAR(100),
+    reporting_manager VARCHAR(100),
+    work_location     VARCHAR(100),
+    work_type         VARCHAR(50),
+    salary            VARCHAR(50),
+    company           VARCHAR(100),
+    bank_name         VARCHAR(100),
+    branch            VARCHAR(100),
+    bank_address      VARCHAR(255),
+    bank_code_1       VARCHAR(50),
+    bank_code_2       VARCHAR(50),
+    account_number    VARCHAR(50),
+    bank_country      VARCHAR(100),
+    address_line_1    VARCHAR(255),
+    address_line_2    VARCHAR(255),
+    city              VARCHAR(100),
+    district          VARCHAR(100),
+    state             VARCHAR(100),
+    country           VARCHAR(100),
+    postal_code       VARCHAR(20),
+    department_id     INTEGER,
+    role              VARCHAR(50) NOT NULL DEFAULT 'user'
+);
+
+CREATE TABLE IF NOT EXISTS departments (
+    id          SERIAL PRIMARY KEY,
+    name        VARCHAR(50) NOT NULL,
+    description TEXT,
+    manager_id  INTEGER,
+    location    VARCHAR(225) NOT NULL,
+    phone       VARCHAR(50) NOT NULL,
+    email       VARCHAR(255) NOT NULL,
+    created_at  TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'users_department_id_fkey') THEN
+        ALTER TABLE users
+            ADD CONSTRAINT users_department_id_fkey
+            FOREIGN KEY (department_id) REFERENCES departments (id);
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'departments_manager_id_fkey') THEN
+        ALTER TABLE departments
+            ADD CONSTRAINT departments_manager_id_fkey
+            FOREIGN KEY (manager_id) REFERENCES users (id) ON DELETE SET NULL;
+    END IF;
+END
+$$;
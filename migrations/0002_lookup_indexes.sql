@@ -0,0 +1,15 @@
+-- Unique lookups relied on by login, registration (ON CONFLICT) and department creation.
+-- Existing duplicate usernames, phones or department names must be cleaned up first.
+CREATE UNIQUE INDEX IF NOT EXISTS users_username_key ON users (username);
+CREATE UNIQUE INDEX IF NOT EXISTS users_phone_key ON users (phone);
+CREATE UNIQUE INDEX IF NOT EXISTS departments_name_key ON departments (name);
+
+-- Keyset pagination of /api/user/get-all-users filtered by department or role
+CREATE INDEX IF NOT EXISTS users_department_id_id_idx ON users (department_id, id);
+CREATE INDEX IF NOT EXISTS users_role_id_idx ON users (role, id);
+
+-- Keyset pagination of /api/department/get-all-departments?sort=created_at
+CREATE INDEX IF NOT EXISTS departments_created_at_id_idx ON departments (created_at, id);
+
+-- Foreign key lookups
+CREATE INDEX IF NOT EXISTS departments_manager_id_idx ON departments (manager_id);
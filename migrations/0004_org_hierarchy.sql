@@ -0,0 +1,72 @@
+-- Reporting-manager tree for /api/org/*.
+-- users.reporting_manager is free text (the manager's username, or their numeric user id);
+-- users.manager_id is that reference resolved to a user id, kept current by the triggers below,
+-- so the hierarchy queries are recursive CTEs that walk users_manager_id_id_idx.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS manager_id INTEGER;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'users_manager_id_fkey') THEN
+        ALTER TABLE users
+            ADD CONSTRAINT users_manager_id_fkey
+            FOREIGN KEY (manager_id) REFERENCES users (id) ON DELETE SET NULL;
+    END IF;
+END
+$$;
+
+-- Direct reports of a manager, in id order (the recursive step of the subtree query)
+CREATE INDEX IF NOT EXISTS users_manager_id_id_idx ON users (manager_id, id);
+-- References not resolved yet, adopted when a user with that username is created
+CREATE INDEX IF NOT EXISTS users_unresolved_manager_idx ON users (reporting_manager)
+    WHERE manager_id IS NULL AND reporting_manager IS NOT NULL;
+
+-- Backfill existing rows: usernames first, then numeric ids
+UPDATE users AS u SET manager_id = m.id
+FROM users AS m
+WHERE u.manager_id IS NULL AND m.username = u.reporting_manager AND m.id <> u.id;
+
+UPDATE users AS u SET manager_id = m.id
+FROM users AS m
+WHERE u.manager_id IS NULL
+  AND m.id = CASE WHEN u.reporting_manager ~ '^[0-9]{1,9}$' THEN u.reporting_manager::int END
+  AND m.id <> u.id;
+
+-- Resolve reporting_manager whenever a row is written with it
+CREATE OR REPLACE FUNCTION users_resolve_manager() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.manager_id := NULL;
+    IF NEW.reporting_manager IS NOT NULL THEN
+        SELECT id INTO NEW.manager_id FROM users WHERE username = NEW.reporting_manager;
+        IF NEW.manager_id IS NULL AND NEW.reporting_manager ~ '^[0-9]{1,9}$' THEN
+            SELECT id INTO NEW.manager_id FROM users WHERE id = NEW.reporting_manager::int;
+        END IF;
+        IF NEW.manager_id = NEW.id THEN
+            NEW.manager_id := NULL;
+        END IF;
+    END IF;
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS users_resolve_manager ON users;
+CREATE TRIGGER users_resolve_manager
+    BEFORE INSERT OR UPDATE OF reporting_manager ON users
+    FOR EACH ROW EXECUTE FUNCTION users_resolve_manager();
+
+-- Once per INSERT statement (registration, bulk import): point waiting reports at new managers,
+-- including managers created in the same statement as their reports
+CREATE OR REPLACE FUNCTION users_adopt_reports() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE users AS u SET manager_id = m.id
+    FROM inserted AS m
+    WHERE u.manager_id IS NULL AND u.reporting_manager = m.username AND u.id <> m.id;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS users_adopt_reports ON users;
+CREATE TRIGGER users_adopt_reports
+    AFTER INSERT ON users
+    REFERENCING NEW TABLE AS inserted
+    FOR EACH STATEMENT EXECUTE FUNCTION users_adopt_reports();
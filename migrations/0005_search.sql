@@ -0,0 +1,35 @@
+-- Full-text search for /api/search.
+-- Each table gets a stored, weighted tsvector (A: names, B: descriptive text, C: places) with a
+-- GIN index; the 'simple' configuration keeps names unstemmed so prefixes match what was typed.
+-- Adding the generated columns rewrites both tables once.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+    -- "jane.doe@example.com" is indexed as jane, doe, example, com
+    setweight(to_tsvector('simple', translate(coalesce(username, ''), '.@_-+', '     ')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(job_position, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(city, '')), 'C')
+) STORED;
+
+ALTER TABLE departments ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(description, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(location, '')), 'C')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS users_search_idx ON users USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS departments_search_idx ON departments USING GIN (search_vector);
+
+-- Typo-tolerant and infix matching on names needs pg_trgm (a contrib extension). Where it is not
+-- installed the search falls back to full-text prefix matching; run this block again once it is.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS users_name_trgm_idx ON users USING GIN (name gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS departments_name_trgm_idx ON departments USING GIN (name gin_trgm_ops);
+    ELSE
+        RAISE NOTICE 'pg_trgm is not available: /api/search uses full-text prefix matching only';
+    END IF;
+END
+$$;
@@ -3,7 +3,68 @@ from main.app import main_app
 App = main_app
 
 
+def check_worker_backends(workers: int) -> None:
+    """
+    Refuse, or warn about, stores that keep one copy per worker process when more than one worker
+    serves requests (see the notes above SERVER_WORKERS in tools/constant.py).
+    """
+    import logging
+    from tools import constant as const
+
+    if workers <= 1:
+        return
+    if const.REVOCATION_BACKEND == "memory":
+        raise SystemExit(
+            f"REVOCATION_BACKEND=memory keeps revoked refresh tokens per worker, so with {workers} workers "
+            "a used refresh token still works on the others. Use REVOCATION_BACKEND=postgres or SERVER_WORKERS=1."
+        )
+
+    logger = logging.getLogger("run")
+    if const.RATE_LIMIT_BACKEND == "memory":
+        logger.warning(
+            "RATE_LIMIT_BACKEND=memory with %d workers: each worker counts login attempts on its own, "
+            "so up to %d times the configured limits are allowed. Set RATE_LIMIT_BACKEND=redis to share them.",
+            workers, workers,
+        )
+    if const.CACHE_BACKEND == "memory":
+        logger.warning(
+            "CACHE_BACKEND=memory with %d workers: a department update only invalidates the worker that made it, "
+            "the others serve the old row for up to %ss. Set CACHE_BACKEND=redis to share the cache.",
+            workers, const.DEPARTMENT_CACHE_TTL,
+        )
+    logger.warning(
+        "Logging out denies the access token on the worker that served /logout only; "
+        "the other %d workers accept it until it expires (ACCESS_TOKEN_EXPIRE_MINUTES=%s).",
+        workers - 1, const.ACCESS_TOKEN_EXPIRE_MINUTES,
+    )
+
+
+def server_options() -> dict:
+    """uvicorn settings for `python run.py`, all from tools.constant / the environment."""
+    import os
+    from tools import constant as const
+
+    options = dict(
+        host=const.SERVER_HOST,
+        port=const.SERVER_PORT,
+        loop=const.SERVER_LOOP,
+        http=const.SERVER_HTTP,
+        backlog=const.SERVER_BACKLOG,
+        timeout_keep_alive=const.SERVER_KEEP_ALIVE,
+        timeout_graceful_shutdown=const.SERVER_GRACEFUL_TIMEOUT,
+        proxy_headers=True,
+        forwarded_allow_ips=const.SERVER_FORWARDED_ALLOW_IPS,
+    )
+    if const.SERVER_RELOAD:
+        # The file watcher only works with a single process
+        return dict(options, reload=True)
+    # Each worker is its own process with its own event loop and database pool (opened in main.app's lifespan)
+    workers = const.SERVER_WORKERS or os.cpu_count() or 1
+    check_worker_backends(workers)
+    return dict(options, workers=workers)
+
+
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run("run:App", reload=True)
+    uvicorn.run("run:App", **server_options())
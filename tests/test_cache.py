@@ -0,0 +1,131 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+
+from tools import metrics
+from tools.cache import InMemoryCacheBackend, ReadThroughCache, RedisCacheBackend
+
+
+class FakeRedis:
+    """The slice of the redis.asyncio client RedisCacheBackend uses, stored in a dict as bytes."""
+
+    def __init__(self):
+        self.data = {}
+
+    def _live(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    async def get(self, key):
+        return self._live(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = (value, time.monotonic() + ex if ex else None)
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def incr(self, key):
+        value = int(self._live(key) or 0) + 1
+        self.data[key] = (str(value).encode(), None)
+        return value
+
+
+@pytest.fixture(params=["memory", "redis"])
+def cache(request):
+    backend = InMemoryCacheBackend() if request.param == "memory" else RedisCacheBackend(FakeRedis())
+    # A namespace per test keeps the process-wide cache_lookups_total series apart
+    return ReadThroughCache(f"test-{uuid.uuid4().hex}", backend, ttl=60)
+
+
+class Table:
+    """A one-row stand-in for the departments table that counts loads."""
+
+    def __init__(self, name):
+        self.row = {"id": 1, "name": name}
+        self.loads = 0
+
+    async def load(self):
+        self.loads += 1
+        return dict(self.row)
+
+
+def test_read_through_caches_loaded_rows(cache):
+    async def scenario():
+        table = Table("Finance")
+        assert await cache.get_or_load("id:1", table.load) == {"id": 1, "name": "Finance"}
+        assert await cache.get_or_load("id:1", table.load) == {"id": 1, "name": "Finance"}
+        assert table.loads == 1
+        assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+    asyncio.run(scenario())
+
+
+def test_missing_rows_are_not_cached(cache):
+    async def scenario():
+        loads = []
+
+        async def load():
+            loads.append(1)
+            return None
+
+        assert await cache.get_or_load("id:2", load) is None
+        assert await cache.get_or_load("id:2", load) is None
+        assert len(loads) == 2
+
+    asyncio.run(scenario())
+
+
+def test_invalidate_drops_rows_and_listings(cache):
+    async def scenario():
+        table = Table("Finance")
+        await cache.get_or_load("id:1", table.load)
+        await cache.get_or_load("list:20:id", table.load)
+
+        table.row["name"] = "Accounts"
+        await cache.invalidate()
+
+        assert (await cache.get_or_load("id:1", table.load))["name"] == "Accounts"
+        assert (await cache.get_or_load("list:20:id", table.load))["name"] == "Accounts"
+        assert table.loads == 4
+        assert await cache.generation() == 1
+        assert cache.stats()["invalidations"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_load_racing_a_write_does_not_store_the_old_row(cache):
+    async def scenario():
+        table = Table("Finance")
+
+        async def slow_load():
+            row = await table.load()
+            # The update commits and invalidates while this read is still in flight
+            table.row["name"] = "Accounts"
+            await cache.invalidate()
+            return row
+
+        assert (await cache.get_or_load("id:1", slow_load))["name"] == "Finance"
+        assert (await cache.get_or_load("id:1", table.load))["name"] == "Accounts"
+
+    asyncio.run(scenario())
+
+
+def test_lookups_are_exported_as_metrics(cache):
+    async def scenario():
+        table = Table("Finance")
+        await cache.get_or_load("id:1", table.load)
+        await cache.get_or_load("id:1", table.load)
+        await cache.get_or_load("id:1", table.load)
+
+        exposition = metrics.render()
+        assert f'cache_lookups_total{{cache="{cache.namespace}",result="hit"}} 2' in exposition
+        assert f'cache_lookups_total{{cache="{cache.namespace}",result="miss"}} 1' in exposition
+
+    asyncio.run(scenario())
@@ -0,0 +1,131 @@
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import orjson
+from tools import metrics
+from tools.constant import CACHE_BACKEND, REDIS_URL, CACHE_MAX_SIZE
+
+
+class InMemoryCacheBackend:
+    """
+    TTL + LRU cache local to this worker process.
+    Counters created through incr() are kept apart so LRU pressure can never reset them.
+    """
+
+    def __init__(self, max_size: int = CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        if key in self._counters:
+            return self._counters[key]
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ex: int) -> None:
+        self._entries[key] = (time.monotonic() + ex, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+            self._counters.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+
+class RedisCacheBackend:
+    """
+    Adapter for a Redis-compatible asyncio client (get, set with ex, delete, incr).
+    Values are stored as JSON, so anything cached must be JSON-serializable.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.client.get(key)
+        return None if raw is None else orjson.loads(raw)
+
+    async def set(self, key: str, value: Any, ex: int) -> None:
+        await self.client.set(key, orjson.dumps(value), ex=ex)
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*keys)
+
+    async def incr(self, key: str) -> int:
+        return int(await self.client.incr(key))
+
+
+def create_cache_backend():
+    """Build the backend selected by CACHE_BACKEND."""
+    if CACHE_BACKEND == "redis":
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package to be installed.")
+        return RedisCacheBackend(redis.from_url(REDIS_URL))
+    return InMemoryCacheBackend()
+
+
+class ReadThroughCache:
+    """
+    Read-through cache for one namespace of keys.
+    Every key embeds the namespace's generation number, so invalidate() drops all of them at once;
+    a value loaded before a write is stored under the old generation, where no later read finds it.
+    """
+
+    def __init__(self, namespace: str, backend, ttl: int):
+        self.namespace = namespace
+        self.backend = backend
+        self.ttl = ttl
+
+    def _key(self, generation: int, key: str) -> str:
+        return f"{self.namespace}:{generation}:{key}"
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        # Read the generation before loading: a write that lands during loader() bumps it
+        full_key = self._key(await self.generation(), key)
+        value = await self.backend.get(full_key)
+        if value is not None:
+            metrics.cache_lookups_total.inc(self.namespace, "hit")
+            return value
+
+        metrics.cache_lookups_total.inc(self.namespace, "miss")
+        value = await loader()
+        if value is not None:  # Misses for missing rows are not cached
+            await self.backend.set(full_key, value, ex=self.ttl)
+        return value
+
+    async def invalidate(self) -> None:
+        """Call after every committed write; entries of older generations age out through their TTL."""
+        metrics.cache_invalidations_total.inc(self.namespace)
+        await self.backend.incr(f"{self.namespace}:generation")
+
+    async def generation(self) -> int:
+        return int(await self.backend.get(f"{self.namespace}:generation") or 0)
+
+    def stats(self) -> Dict:
+        hits = metrics.cache_lookups_total.value(self.namespace, "hit")
+        misses = metrics.cache_lookups_total.value(self.namespace, "miss")
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": hits,
+            "misses": misses,
+            "invalidations": metrics.cache_invalidations_total.value(self.namespace),
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+        }
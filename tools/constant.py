@@ -15,3 +15,104 @@ JWT_REFRESH_SECRET_KEY = env("JWT_REFRESH_SECRET_KEY", "default_refresh_secret")
 # Algorithm (HS256 is a common default)
 ALGORITHM = env("ALGORITHM", "HS256")
 
+# Access tokens with RS256/ES256: private keys are JWT_KEYS_DIR/<kid>.pem (see keygen.py),
+# the public halves are served at /.well-known/jwks.json
+JWT_KEYS_DIR = env("JWT_KEYS_DIR", "keys")
+JWT_ACTIVE_KID = env("JWT_ACTIVE_KID", "")  # Key that signs new tokens (default: last kid by name)
+JWKS_CACHE_TTL = int(env("JWKS_CACHE_TTL", 300))  # Seconds verifiers and HTTP caches keep the key set
+
+# Refresh tokens never leave this app, so they stay HMAC-signed with JWT_REFRESH_SECRET_KEY
+REFRESH_TOKEN_ALGORITHM = ALGORITHM if ALGORITHM.startswith("HS") else "HS256"
+
+# Database connection pool
+DB_POOL_MIN_SIZE = int(env("DB_POOL_MIN_SIZE", 5))
+DB_POOL_MAX_SIZE = int(env("DB_POOL_MAX_SIZE", 20))
+DB_POOL_ACQUIRE_TIMEOUT = float(env("DB_POOL_ACQUIRE_TIMEOUT", 10))  # Seconds to wait for a free connection
+DB_POOL_MAX_INACTIVE_CONNECTION_LIFETIME = float(env("DB_POOL_MAX_INACTIVE_CONNECTION_LIFETIME", 300))  # Seconds before an idle connection is closed
+DB_POOL_MAX_QUERIES = int(env("DB_POOL_MAX_QUERIES", 50000))  # Queries before a connection is replaced
+DB_STATEMENT_CACHE_SIZE = int(env("DB_STATEMENT_CACHE_SIZE", 512))  # Prepared statements kept per connection
+
+# Verified-token cache (entries also expire at each token's exp claim)
+TOKEN_CACHE_MAX_SIZE = int(env("TOKEN_CACHE_MAX_SIZE", 10000))
+
+# Password hashing worker pool ("thread" or "process")
+PASSWORD_HASH_EXECUTOR = env("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(env("PASSWORD_HASH_WORKERS", 4))
+PASSWORD_HASH_MAX_CONCURRENCY = int(env("PASSWORD_HASH_MAX_CONCURRENCY", 4))  # Hashes running at once per worker process
+PASSWORD_HASH_MAX_QUEUE = int(env("PASSWORD_HASH_MAX_QUEUE", 100))  # Waiting hashes before rejecting with 503 (0 = unbounded)
+
+# Listing endpoints
+PAGE_SIZE_DEFAULT = int(env("PAGE_SIZE_DEFAULT", 50))
+PAGE_SIZE_MAX = int(env("PAGE_SIZE_MAX", 500))
+STREAM_PREFETCH = int(env("STREAM_PREFETCH", 500))  # Rows fetched per server-side cursor round trip
+
+# Org hierarchy endpoints (/api/org): deepest level walked, and most members walked
+# and returned per subtree (the walk itself stops there)
+ORG_MAX_DEPTH = int(env("ORG_MAX_DEPTH", 32))
+ORG_SUBTREE_MAX_ROWS = int(env("ORG_SUBTREE_MAX_ROWS", 5000))
+
+# Search endpoint (/api/search): words of the query that are matched, the rest is ignored
+SEARCH_MAX_TERMS = int(env("SEARCH_MAX_TERMS", 8))
+
+# Read-through caches ("memory" keeps entries in each worker, "redis" shares them through REDIS_URL)
+CACHE_BACKEND = env("CACHE_BACKEND", "memory")
+REDIS_URL = env("REDIS_URL", "redis://localhost:6379/0")
+CACHE_MAX_SIZE = int(env("CACHE_MAX_SIZE", 10000))  # Entries per in-memory cache
+DEPARTMENT_CACHE_TTL = int(env("DEPARTMENT_CACHE_TTL", 60))  # Seconds
+
+# Upper bound of compiled UPDATE statements per table; past it a single all-columns statement is used
+UPDATE_BUILDER_MAX_STATEMENTS = int(env("UPDATE_BUILDER_MAX_STATEMENTS", 64))
+
+# Bulk user import
+BULK_IMPORT_BATCH_SIZE = int(env("BULK_IMPORT_BATCH_SIZE", 1000))  # Rows validated, hashed and copied per transaction
+BULK_IMPORT_MAX_ROWS = int(env("BULK_IMPORT_MAX_ROWS", 50000))
+
+# Items accepted per section of a department batch request
+DEPARTMENT_BATCH_MAX_ITEMS = int(env("DEPARTMENT_BATCH_MAX_ITEMS", 1000))
+
+# Require a valid access token on every non-public route (tools.middleware.RoleMiddleware)
+GLOBAL_AUTH_ENABLED = env("GLOBAL_AUTH_ENABLED", default=False, cast=bool)
+
+# Routers mounted by main.app, comma-separated module names of main/src/apis (empty = all).
+# A process that serves only part of the API (e.g. ENABLED_ROUTERS=auth,health) never imports the rest.
+ENABLED_ROUTERS = [name.strip() for name in env("ENABLED_ROUTERS", default="").split(",") if name.strip()]
+
+# Prometheus metrics at /metrics (tools.metrics)
+METRICS_ENABLED = env("METRICS_ENABLED", default=True, cast=bool)
+SLOW_QUERY_THRESHOLD_MS = float(env("SLOW_QUERY_THRESHOLD_MS", 0))  # Log statements slower than this (0 = off)
+
+# Revoked refresh tokens ("postgres" shares them through the revoked_tokens table; "memory" is per worker,
+# so a rotated-out refresh token would still work on the other workers: single-worker setups only)
+REVOCATION_BACKEND = env("REVOCATION_BACKEND", "postgres")
+REVOCATION_COMPACT_INTERVAL = float(env("REVOCATION_COMPACT_INTERVAL", 300))  # Seconds between purges of expired ids
+REVOCATION_SYNC_INTERVAL = float(env("REVOCATION_SYNC_INTERVAL", 5))  # Seconds between reads of other workers' revocations
+
+# Login throttling (tools.ratelimit): attempts per sliding window, by username and by client IP
+RATE_LIMIT_BACKEND = env("RATE_LIMIT_BACKEND", "memory")  # "memory" per worker, "redis" shared through REDIS_URL
+RATE_LIMIT_MAX_KEYS = int(env("RATE_LIMIT_MAX_KEYS", 100000))  # Tracked usernames + IPs per in-memory store
+LOGIN_RATE_LIMIT_WINDOW = int(env("LOGIN_RATE_LIMIT_WINDOW", 60))  # Seconds
+LOGIN_RATE_LIMIT_PER_USERNAME = int(env("LOGIN_RATE_LIMIT_PER_USERNAME", 5))  # All attempts (0 = off)
+LOGIN_RATE_LIMIT_PER_IP = int(env("LOGIN_RATE_LIMIT_PER_IP", 30))  # Failed attempts only (0 = off)
+
+# Production server (python run.py). Every worker opens its own pool: budget
+# SERVER_WORKERS * DB_POOL_MAX_SIZE connections against Postgres' max_connections.
+# Every worker also has its own copy of each "memory" backend. With more than one worker:
+#   REVOCATION_BACKEND=memory   refused at startup (refresh tokens could be replayed on another worker)
+#   RATE_LIMIT_BACKEND=memory   login limits apply per worker, up to SERVER_WORKERS times the configured ones
+#   CACHE_BACKEND=memory        a department write invalidates only the worker that made it (stale up to the TTL)
+#   logout                      the access token is denied by the worker that served /logout only, until it expires
+# Set RATE_LIMIT_BACKEND=redis and CACHE_BACKEND=redis to share them; run.py logs a warning otherwise.
+SERVER_HOST = env("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(env("SERVER_PORT", 8000))
+SERVER_WORKERS = int(env("SERVER_WORKERS", 0))  # 0 = one worker per CPU core
+SERVER_LOOP = env("SERVER_LOOP", "auto")  # "auto" uses uvloop when installed, else "asyncio"
+SERVER_HTTP = env("SERVER_HTTP", "auto")  # "auto" uses httptools when installed, else "h11"
+SERVER_KEEP_ALIVE = int(env("SERVER_KEEP_ALIVE", 5))  # Seconds an idle keep-alive connection stays open
+SERVER_BACKLOG = int(env("SERVER_BACKLOG", 2048))  # Pending connections the listening socket queues
+SERVER_GRACEFUL_TIMEOUT = int(env("SERVER_GRACEFUL_TIMEOUT", 30))  # Seconds in-flight requests get on shutdown
+SERVER_FORWARDED_ALLOW_IPS = env("SERVER_FORWARDED_ALLOW_IPS", "127.0.0.1")  # Proxies trusted for X-Forwarded-For
+SERVER_RELOAD = env("SERVER_RELOAD", default=False, cast=bool)  # Development only: one worker with a file watcher
+
+# Load benchmarks (python bench.py load) migrate this database and load fixture rows into it, and the
+# server they boot uses it too. It must be a database of its own, never DATABASE_URL.
+BENCH_DATABASE_URL = env("BENCH_DATABASE_URL", "")
@@ -1,6 +1,146 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
 import asyncpg
+from fastapi import HTTPException
 from tools import constant as const
+from tools import metrics
+from tools.statements import prepare_statements
+
+# Application-wide pool, created on startup and closed on shutdown (see main.app)
+_pool: Optional[asyncpg.Pool] = None
+# True between a completed init_pool() and the start of close_pool(); drives the readiness probe
+_ready = False
+
+# Acquire counters reported by pool_stats()
+_acquire_count = 0
+_acquire_timeouts = 0
+_acquire_wait_total = 0.0
+
+
+async def init_pool() -> asyncpg.Pool:
+    """
+    Create the shared connection pool if it does not exist yet.
+    create_pool() returns once min_size connections are open and have prepared the hot statements.
+    """
+    global _pool, _ready
+    if _pool is None:
+        _pool = await asyncpg.create_pool(
+            const.DATABASE_URL,
+            min_size=const.DB_POOL_MIN_SIZE,
+            max_size=const.DB_POOL_MAX_SIZE,
+            max_queries=const.DB_POOL_MAX_QUERIES,
+            max_inactive_connection_lifetime=const.DB_POOL_MAX_INACTIVE_CONNECTION_LIFETIME,
+            statement_cache_size=const.DB_STATEMENT_CACHE_SIZE,
+            init=prepare_statements,  # Hot statements are prepared once per pooled connection
+        )
+    _ready = True
+    return _pool
+
+
+async def close_pool() -> None:
+    """Gracefully close every connection in the shared pool."""
+    global _pool, _ready
+    _ready = False
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.close()
+
+
+def get_pool() -> asyncpg.Pool:
+    """Return the shared pool, failing loudly if startup did not create it."""
+    if _pool is None:
+        raise RuntimeError("Database pool is not initialized. Call init_pool() on startup.")
+    return _pool
+
+
+@asynccontextmanager
+async def connection() -> AsyncIterator[asyncpg.Connection]:
+    """
+    Borrow a connection from the shared pool and always hand it back.
+
+    Usage:
+        async with connection() as db:
+            await db.fetchrow(...)
+    """
+    global _acquire_count, _acquire_timeouts, _acquire_wait_total
+    pool = get_pool()
+
+    started = time.perf_counter()
+    try:
+        db = await pool.acquire(timeout=const.DB_POOL_ACQUIRE_TIMEOUT)
+    except asyncio.TimeoutError:
+        _acquire_timeouts += 1
+        metrics.db_pool_acquire_timeouts_total.inc()
+        raise HTTPException(status_code=503, detail="Database is busy. Please retry.", headers={"Retry-After": "1"})
+    waited = time.perf_counter() - started
+    _acquire_count += 1
+    _acquire_wait_total += waited
+    metrics.db_pool_acquire_wait_seconds.observe(waited)
+
+    try:
+        yield db
+    finally:
+        await pool.release(db)
+
+
+async def get_db() -> AsyncIterator[asyncpg.Connection]:
+    """FastAPI dependency yielding a pooled connection for the request."""
+    async with connection() as db:
+        yield db
+
+
+async def check_ready(timeout: float = 2.0) -> bool:
+    """Whether this worker can serve traffic: the pool is warm and answers a trivial query in time."""
+    if not _ready or _pool is None:
+        return False
+    try:
+        async with _pool.acquire(timeout=timeout) as db:
+            await db.fetchval("SELECT 1", timeout=timeout)
+    except (asyncio.TimeoutError, asyncpg.PostgresError, OSError):
+        return False
+    return True
+
+
+def pool_stats() -> dict:
+    """Snapshot of pool sizing and acquire counters."""
+    stats = {
+        "initialized": _pool is not None,
+        "acquired": _acquire_count,
+        "acquire_timeouts": _acquire_timeouts,
+        "acquire_wait_avg_ms": (_acquire_wait_total / _acquire_count * 1000) if _acquire_count else 0.0,
+    }
+    if _pool is not None:
+        size = _pool.get_size()
+        idle = _pool.get_idle_size()
+        stats.update({
+            "min_size": _pool.get_min_size(),
+            "max_size": _pool.get_max_size(),
+            "size": size,
+            "idle": idle,
+            "in_use": size - idle,
+        })
+    return stats
+
+
+def _pool_connections() -> dict:
+    if _pool is None:
+        return {}
+    size, idle = _pool.get_size(), _pool.get_idle_size()
+    return {("in_use",): size - idle, ("idle",): idle}
+
+
+metrics.Gauge("db_pool_connections", "Pooled connections by state.", _pool_connections, ("state",))
 
 
-async def Db() -> asyncpg.Connection:
-    return await asyncpg.connect(const.DATABASE_URL)
+async def stream(query: str, *args, prefetch: int = const.STREAM_PREFETCH) -> AsyncIterator[asyncpg.Record]:
+    """
+    Yield rows through a server-side cursor so large results never sit in memory at once.
+    The pooled connection is held until the iterator is exhausted or closed.
+    """
+    async with connection() as db:
+        async with db.transaction(readonly=True):
+            async for record in db.cursor(query, *args, prefetch=prefetch):
+                yield record
@@ -0,0 +1,125 @@
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from jose import jwk, jwt, JWTError
+from jose.backends.base import Key
+from tools.constant import ALGORITHM, JWT_KEYS_DIR, JWT_ACTIVE_KID, JWKS_CACHE_TTL
+
+# Algorithms signed with a private key and verified with a published public key
+ASYMMETRIC_ALGORITHMS = frozenset({"RS256", "RS384", "RS512", "ES256", "ES384", "ES512"})
+
+
+def is_asymmetric(algorithm: str = ALGORITHM) -> bool:
+    return algorithm in ASYMMETRIC_ALGORITHMS
+
+
+class KeySet:
+    """
+    Signing keys of this app: one PEM private key per file, named <kid>.pem.
+
+    Every key verifies tokens, only the active one signs, so a key is rotated by adding a
+    new file, making it active, and deleting the old file once its tokens have expired.
+    Keys are parsed once; the public JWKS document is built once.
+    """
+
+    def __init__(self, algorithm: str, directory: Path, active_kid: Optional[str] = None):
+        self.algorithm = algorithm
+        self._private: Dict[str, Key] = {}
+        self._public: Dict[str, Key] = {}
+        self._jwks: List[Dict] = []
+
+        for path in sorted(directory.glob("*.pem")):
+            kid = path.stem
+            private = jwk.construct(path.read_text(), algorithm)
+            public = private.public_key()
+            self._private[kid] = private
+            self._public[kid] = public
+            self._jwks.append(dict(public.to_dict(), kid=kid, use="sig", alg=algorithm))
+
+        if not self._private:
+            raise RuntimeError(f"ALGORITHM={algorithm} needs at least one <kid>.pem private key in {directory}.")
+        # Default to the newest kid by name, e.g. 2026-10 over 2026-04
+        self.active_kid = active_kid or sorted(self._private)[-1]
+        if self.active_kid not in self._private:
+            raise RuntimeError(f"JWT_ACTIVE_KID '{self.active_kid}' has no key file in {directory}.")
+
+    def signing_key(self) -> Tuple[str, Key]:
+        return self.active_kid, self._private[self.active_kid]
+
+    def public_key(self, kid: Optional[str]) -> Optional[Key]:
+        return self._public.get(kid)
+
+    def jwks(self) -> Dict:
+        return {"keys": list(self._jwks)}
+
+
+_key_set: Optional[KeySet] = None
+
+
+def get_key_set() -> KeySet:
+    """The app's key set, loaded on first use (only called when ALGORITHM is asymmetric)."""
+    global _key_set
+    if _key_set is None:
+        _key_set = KeySet(ALGORITHM, Path(JWT_KEYS_DIR), JWT_ACTIVE_KID or None)
+    return _key_set
+
+
+def public_jwks() -> Dict:
+    """JWKS document served at /.well-known/jwks.json; empty while tokens are HMAC-signed."""
+    return get_key_set().jwks() if is_asymmetric() else {"keys": []}
+
+
+class JWKSKeyCache:
+    """
+    Verifier-side cache of a remote JWKS, for services that check this app's tokens locally.
+
+    Public keys are parsed once and kept for `ttl` seconds. A token signed with an unknown kid
+    triggers one early refresh (at most every `min_refresh_interval` seconds), so a key rotation
+    is picked up without hammering the JWKS endpoint.
+
+        keys = JWKSKeyCache("https://erp.example.com/.well-known/jwks.json")
+        claims = keys.decode(token)
+    """
+
+    def __init__(self, url: str, ttl: float = JWKS_CACHE_TTL, min_refresh_interval: float = 30.0,
+                 timeout: float = 5.0):
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self._keys: Dict[str, Tuple[str, Key]] = {}
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def _fetch(self) -> Dict:
+        import urllib.request  # Only verifiers fetch keys; the app itself never needs it
+
+        with urllib.request.urlopen(self.url, timeout=self.timeout) as response:
+            return json.load(response)
+
+    def refresh(self) -> None:
+        keys = {}
+        for entry in self._fetch().get("keys", []):
+            if entry.get("kid") and entry.get("alg") in ASYMMETRIC_ALGORITHMS:
+                keys[entry["kid"]] = (entry["alg"], jwk.construct(entry, entry["alg"]))
+        with self._lock:
+            self._keys = keys
+            self._fetched_at = time.monotonic()
+
+    def get(self, kid: str) -> Optional[Tuple[str, Key]]:
+        age = time.monotonic() - self._fetched_at
+        if age > self.ttl or (kid not in self._keys and age > self.min_refresh_interval):
+            self.refresh()
+        return self._keys.get(kid)
+
+    def decode(self, token: str, **options) -> Dict:
+        """Verify the signature and standard claims; raises JWTError like jose.jwt.decode."""
+        kid = jwt.get_unverified_header(token).get("kid")
+        entry = self.get(kid)
+        if entry is None:
+            raise JWTError(f"Unknown signing key '{kid}'.")
+        algorithm, key = entry
+        return jwt.decode(token, key, algorithms=[algorithm], **options)
@@ -0,0 +1,203 @@
+import logging
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from tools.constant import SLOW_QUERY_THRESHOLD_MS
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of histogram buckets, +Inf is implied
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+CPU_BUCKETS = (0.0001, 0.0005, 0.001, 0.01, 0.05, 0.1, 0.2, 0.4, 0.8, 1.6, 3.2)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Every metric of this process, in registration order, rendered by render()
+_metrics: List["Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    """Base of every metric: a name, help text and label names, registered on creation."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        _metrics.append(self)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in list(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge(Metric):
+    """A gauge read from a callback at scrape time, so hot paths never update it."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, callback: Callable[[], Dict[Tuple[str, ...], float]],
+                 labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.callback = callback
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self.callback().items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram(Metric):
+    """Fixed-bucket histogram; buckets are counted individually and made cumulative on render."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = REQUEST_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def samples(self) -> Iterable[str]:
+        for labels, (counts, total, count) in list(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % (bound if bound == "+Inf" else _format_value(bound))
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}"
+
+
+def render() -> str:
+    """Every metric in the Prometheus text exposition format."""
+    return "\n".join(metric.render() for metric in _metrics) + "\n"
+
+
+# HTTP
+http_requests_total = Counter(
+    "http_requests_total", "HTTP requests by route template and status code.", ("method", "route", "status")
+)
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds", "Time until the response body was fully sent.", ("method", "route")
+)
+
+# Database
+db_query_duration_seconds = Histogram(
+    "db_query_duration_seconds", "Execution time of named statements.", ("statement",), QUERY_BUCKETS
+)
+db_query_rows_total = Counter("db_query_rows_total", "Rows returned by named statements.", ("statement",))
+db_slow_queries_total = Counter(
+    "db_slow_queries_total", "Statements slower than SLOW_QUERY_THRESHOLD_MS.", ("statement",)
+)
+db_pool_acquire_wait_seconds = Histogram(
+    "db_pool_acquire_wait_seconds", "Time spent waiting for a pooled connection.", buckets=QUERY_BUCKETS
+)
+db_pool_acquire_timeouts_total = Counter(
+    "db_pool_acquire_timeouts_total", "Pool acquires that timed out and were answered with 503."
+)
+
+# CPU-bound auth work
+password_hash_duration_seconds = Histogram(
+    "password_hash_duration_seconds", "bcrypt time on the worker pool.", ("operation",), CPU_BUCKETS
+)
+jwt_duration_seconds = Histogram(
+    "jwt_duration_seconds", "JWT signing and verification time (cache hits are not timed).",
+    ("token", "operation"), CPU_BUCKETS,
+)
+
+# Read-through caches (tools.cache); hit ratio = hit / (hit + miss)
+cache_lookups_total = Counter("cache_lookups_total", "Read-through cache lookups by result.", ("cache", "result"))
+cache_invalidations_total = Counter("cache_invalidations_total", "Read-through cache invalidations.", ("cache",))
+
+
+def observe_query(name: str, sql: str, elapsed: float, rows: int) -> None:
+    """Record one statement execution and log it when it crosses the slow-query threshold."""
+    db_query_duration_seconds.observe(elapsed, name)
+    db_query_rows_total.inc(name, amount=rows)
+    if SLOW_QUERY_THRESHOLD_MS and elapsed * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+        db_slow_queries_total.inc(name)
+        logger.warning("Slow query %s: %.1f ms, %d rows: %s", name, elapsed * 1000, rows, " ".join(sql.split()))
+
+
+# Per-route request metrics. Plain ASGI like RoleMiddleware, so streaming bodies are timed to the last chunk.
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500  # Reported when the app raises before starting a response
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Label by route template (/get-department/{department_id}), never the raw path,
+            # so the number of series stays bounded
+            route: Optional[object] = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            http_request_duration_seconds.observe(time.perf_counter() - started, method, template)
+            http_requests_total.inc(method, template, str(status))
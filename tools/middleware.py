@@ -1,69 +1,98 @@
-import httpx
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
 from fastapi import HTTPException, Request, Depends
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from tools import token as jwt_token
+
+# Paths reachable without a token, and roles allowed through the global middleware
+PUBLIC_ROUTES = frozenset({
+    "/api/auth/login",
+    "/api/auth/register",
+    "/api/auth/refresh",
+    "/metrics",
+    "/.well-known/jwks.json",
+    "/health/live",
+    "/health/ready",
+})
+ALLOWED_ROLES = frozenset({"super_admin", "department_maker", "department_admin", "department_checker", "super_checker", "user"})
+
+
+def docs_routes(app) -> frozenset:
+    """The schema and docs paths the FastAPI app serves; a URL set to None disables its page, as in FastAPI.setup()."""
+    if not app.openapi_url:
+        return frozenset()
+    urls = {app.openapi_url, app.redoc_url}
+    if app.docs_url:
+        urls.update({app.docs_url, app.swagger_ui_oauth2_redirect_url})
+    return frozenset(url for url in urls if url)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller, decoded from the access token once per request."""
+    username: str
+    role: str
+    id: Optional[int] = None
 
-# Role middleware to check for token validity and role-based access
-class RoleMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # Skip role validation for public routes
-        if self.is_public_route(request.url.path):
-            return await call_next(request)
+    @classmethod
+    def from_payload(cls, payload: Dict) -> "Principal":
+        username = payload.get("username")
+        role = payload.get("role")
+        if not username or not role:
+            raise HTTPException(status_code=401, detail="Invalid token payload. Required fields are missing.")
+        return cls(username=username, role=role, id=payload.get("id"))
+
+    def has_role(self, roles: frozenset) -> bool:
+        return self.role in roles
+
+
+# Role middleware to check for token validity and role-based access.
+# Plain ASGI: it never wraps the response, so streaming bodies pass straight through.
+class RoleMiddleware:
+    def __init__(self, app: ASGIApp, public_routes=PUBLIC_ROUTES, allowed_roles=ALLOWED_ROLES):
+        self.app = app
+        self.public_routes = frozenset(public_routes)
+        self.allowed_roles = frozenset(allowed_roles)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # Skip role validation for non-HTTP traffic, CORS preflights and public routes
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in self.public_routes:
+            await self.app(scope, receive, send)
+            return
 
         # Extract token from Authorization header
-        token = request.headers.get("Authorization")
-        if not token or not token.startswith("Bearer "):
-            raise HTTPException(status_code=401, detail="Authorization token missing or invalid.")
-        
-        token = token[len("Bearer "):]  # Remove "Bearer " from the token string
-        
+        authorization = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                authorization = value.decode("latin-1")
+                break
+
+        if not authorization or not authorization.startswith("Bearer "):
+            await self.reject(scope, receive, send, 401, "Authorization token missing or invalid.")
+            return
+
         # Validate the token and check role
-        await self.validate_access_token(token)
-        
-        # Proceed to the next middleware or request handler
-        response = await call_next(request)
-        return response
-
-    def is_public_route(self, path: str):
-        # List public routes that do not require role validation
-        public_routes = ["/login", "/register", "/api/auth/refresh"]
-        return path in public_routes
-
-    async def validate_access_token(self, token: str):
-        url = "http://127.0.0.1:8000/api/auth/refresh"
-        headers = {"Authorization": f"Bearer {token}"}
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, headers=headers)
-            
-            if response.status_code != 200:
-                raise HTTPException(status_code=response.status_code, detail="Invalid or expired token.")
-            
-            data = response.json()
-            role = data.get("role")
-            
-            # Check if the role is valid for access
-            if not self.is_role_allowed(role):
-                raise HTTPException(status_code=403, detail="You are not authorized to access this resource.")
-
-    def is_role_allowed(self, role: str):
-        # Define allowed roles for accessing the API
-        allowed_roles = ["super_admin", "department_maker", "department_admin", "department_checker", "super_checker", "user"]
-        
-        # Allow access if the role is one of the allowed roles
-        return role in allowed_roles
+        try:
+            principal = authenticate(authorization[len("Bearer "):])
+        except HTTPException as e:
+            await self.reject(scope, receive, send, e.status_code, e.detail)
+            return
 
-# Role-required dependency function for role-based access control
-def role_required(roles: list):
-    async def role_dependency(token: str = Depends(get_bearer_token)):
-        # Call the validate_access_token method to check the role
-        payload = await validate_access_token(token)  # Await the async function
-        
-        if payload["role"] not in roles:
-            raise HTTPException(status_code=403, detail="You are not authorized to access this resource.")
-        
-        return payload
-    
-    return role_dependency
+        if not principal.has_role(self.allowed_roles):
+            await self.reject(scope, receive, send, 403, "You are not authorized to access this resource.")
+            return
+
+        # Expose the decoded principal to handlers as request.state.principal; get_principal reuses it
+        scope.setdefault("state", {})["principal"] = principal
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def reject(scope: Scope, receive: Receive, send: Send, status_code: int, detail: str):
+        headers = {"WWW-Authenticate": "Bearer"} if status_code == 401 else None
+        response = JSONResponse({"detail": detail}, status_code=status_code, headers=headers)
+        await response(scope, receive, send)
 
 # Helper function to extract bearer token from request
 def get_bearer_token(request: Request):
@@ -72,15 +101,33 @@ def get_bearer_token(request: Request):
         return token[len("Bearer "):]
     raise HTTPException(status_code=401, detail="Authorization token missing or invalid.")
 
-# Function to validate the access token and get user role (used by both middleware and role_required)
-async def validate_access_token(token: str):
-    url = "http://127.0.0.1:8000/api/auth/validate_token"
-    headers = {"Authorization": f"Bearer {token}"}
-    
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, headers=headers)
-        
-        if response.status_code != 200:
-            raise HTTPException(status_code=response.status_code, detail="Invalid or expired token.")
-        
-        return response.json()  # Return the payload containing user data and role
\ No newline at end of file
+# Decode an access token into a Principal (used by both the middleware and get_principal)
+def authenticate(token: str) -> Principal:
+    try:
+        payload = jwt_token.validate_access_token(token)
+    except HTTPException:
+        raise HTTPException(status_code=401, detail="Invalid or expired token.")
+    return Principal.from_payload(payload)
+
+# Auth dependency: the caller's principal, decoded at most once per request
+async def get_principal(request: Request) -> Principal:
+    """
+    Reuse the principal stored on request.state by RoleMiddleware or an earlier dependency;
+    otherwise decode the bearer token and store the result there for the rest of the request.
+    """
+    principal = getattr(request.state, "principal", None)
+    if principal is None:
+        principal = authenticate(get_bearer_token(request))
+        request.state.principal = principal
+    return principal
+
+# Role-required dependency function for role-based access control
+def role_required(roles: Iterable[str]):
+    allowed = frozenset(roles)  # Built once per route, each request is a single set lookup
+
+    async def role_dependency(principal: Principal = Depends(get_principal)) -> Principal:
+        if not principal.has_role(allowed):
+            raise HTTPException(status_code=403, detail="You are not authorized to access this resource.")
+        return principal
+
+    return role_dependency
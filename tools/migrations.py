@@ -0,0 +1,134 @@
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import asyncpg
+from tools.statements import hot_queries
+
+# Numbered SQL files, e.g. migrations/0002_lookup_indexes.sql
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+# Serializes concurrent runs (e.g. several workers starting at once)
+MIGRATION_LOCK_ID = 72_731_001
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    sql: str
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.sql.encode()).hexdigest()
+
+
+def load_migrations(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """Read every migration file, ordered by version."""
+    migrations = []
+    for path in sorted(directory.glob("*.sql")):
+        match = MIGRATION_FILE.match(path.name)
+        if not match:
+            raise ValueError(f"Migration file name must look like 0001_name.sql: {path.name}")
+        migrations.append(Migration(int(match.group(1)), match.group(2), path.read_text()))
+
+    versions = [migration.version for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError("Two migration files share the same version number.")
+    return sorted(migrations, key=lambda migration: migration.version)
+
+
+async def _ensure_history_table(db: asyncpg.Connection) -> None:
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version    INTEGER PRIMARY KEY,
+            name       TEXT NOT NULL,
+            checksum   TEXT NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+async def applied_migrations(db: asyncpg.Connection) -> Dict[int, asyncpg.Record]:
+    await _ensure_history_table(db)
+    rows = await db.fetch("SELECT version, name, checksum, applied_at FROM schema_migrations ORDER BY version")
+    return {row["version"]: row for row in rows}
+
+
+async def migrate(db: asyncpg.Connection, target: Optional[int] = None) -> List[Migration]:
+    """
+    Apply pending migrations up to `target` (default: latest), each in its own transaction.
+    Safe to run repeatedly; returns the migrations applied by this call.
+    """
+    await db.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_ID)
+    try:
+        applied = await applied_migrations(db)
+        newly_applied = []
+        for migration in load_migrations():
+            if target is not None and migration.version > target:
+                break
+            if migration.version in applied:
+                if applied[migration.version]["checksum"] != migration.checksum:
+                    raise RuntimeError(
+                        f"Migration {migration.version}_{migration.name} was edited after it was applied. "
+                        "Add a new migration instead."
+                    )
+                continue
+            async with db.transaction():
+                await db.execute(migration.sql)
+                await db.execute(
+                    "INSERT INTO schema_migrations (version, name, checksum) VALUES ($1, $2, $3)",
+                    migration.version, migration.name, migration.checksum,
+                )
+            newly_applied.append(migration)
+        return newly_applied
+    finally:
+        await db.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+
+
+async def migration_status(db: asyncpg.Connection) -> List[Dict]:
+    applied = await applied_migrations(db)
+    return [
+        {
+            "version": migration.version,
+            "name": migration.name,
+            "applied_at": applied[migration.version]["applied_at"].isoformat() if migration.version in applied else None,
+        }
+        for migration in load_migrations()
+    ]
+
+
+def _scan_nodes(plan: Dict) -> List[str]:
+    nodes = []
+    if plan.get("Node Type", "").endswith("Scan"):
+        relation = plan.get("Relation Name")
+        index = plan.get("Index Name")
+        nodes.append(f"{plan['Node Type']} on {relation}" + (f" using {index}" if index else ""))
+    for child in plan.get("Plans", []):
+        nodes.extend(_scan_nodes(child))
+    return nodes
+
+
+async def explain_hot_queries(db: asyncpg.Connection) -> Dict[str, Dict]:
+    """
+    EXPLAIN every statement marked with tools.statements.hot_query() with sequential scans
+    disabled: a remaining Seq Scan means no index can serve it, whatever the current table size.
+    The database layer must be imported first so its statements are registered (see migrate.py).
+    """
+    report = {}
+    async with db.transaction():
+        await db.execute("SET LOCAL enable_seqscan = off")
+        for name, (statement, args) in hot_queries().items():
+            plan = await db.fetchval(f"EXPLAIN (FORMAT JSON) {statement.sql}", *args)
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            scans = _scan_nodes(plan[0]["Plan"])
+            report[name] = {
+                "uses_index": not any(scan.startswith("Seq Scan") for scan in scans),
+                "scans": scans,
+            }
+    return report
@@ -0,0 +1,44 @@
+import base64
+from typing import Any, AsyncIterator, Mapping
+
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
+from tools.constant import STREAM_PREFETCH
+
+
+def encode_cursor(values: list) -> str:
+    """Pack the keyset position of the last row into an opaque continuation token."""
+    return base64.urlsafe_b64encode(orjson.dumps(values)).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """Unpack a continuation token created by encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = orjson.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, orjson.JSONDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+    if not isinstance(values, list) or not values:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+    return values
+
+
+def shaped_response(content: Any) -> ORJSONResponse:
+    """
+    Send rows the query already shaped like the route's response_model. Returning a Response skips
+    FastAPI's re-validation of every row, while response_model still documents the schema.
+    """
+    return ORJSONResponse(content)
+
+
+async def ndjson_stream(records: AsyncIterator[Mapping], batch_size: int = STREAM_PREFETCH) -> AsyncIterator[bytes]:
+    """Encode rows as newline-delimited JSON, flushing every batch_size rows."""
+    buffer = []
+    async for record in records:
+        buffer.append(orjson.dumps(dict(record)))
+        if len(buffer) >= batch_size:
+            yield b"\n".join(buffer) + b"\n"
+            buffer = []
+    if buffer:
+        yield b"\n".join(buffer) + b"\n"
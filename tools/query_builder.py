@@ -0,0 +1,68 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from tools.constant import UPDATE_BUILDER_MAX_STATEMENTS
+from tools.statements import Statement, register_statement
+
+
+class UpdateBuilder:
+    """
+    Builds "UPDATE <table> SET ... WHERE <key> = $n RETURNING ..." for a whitelist of columns.
+
+    Columns are always emitted in whitelist order, so every distinct set of updated columns maps
+    to one bitmask and one compiled, registered statement. Once max_statements masks exist, new
+    combinations share a single statement that sets every column with COALESCE.
+    """
+
+    def __init__(self, name: str, table: str, columns: Sequence[str], key_column: str, returning: str,
+                 max_statements: int = UPDATE_BUILDER_MAX_STATEMENTS):
+        self.name = name
+        self.table = table
+        self.columns = tuple(columns)
+        self.key_column = key_column
+        self.returning = returning
+        self.max_statements = max_statements
+        self._bits = {column: 1 << index for index, column in enumerate(self.columns)}
+        self._compiled: Dict[int, Statement] = {}
+        self._fallback: Optional[Statement] = None
+
+    def _compile(self, mask: int) -> Statement:
+        set_clauses = []
+        for column in self.columns:
+            if mask & self._bits[column]:
+                set_clauses.append(f"{column} = ${len(set_clauses) + 1}")
+        sql = (
+            f"UPDATE {self.table} SET {', '.join(set_clauses)}, updated_at = CURRENT_TIMESTAMP "
+            f"WHERE {self.key_column} = ${len(set_clauses) + 1} RETURNING {self.returning}"
+        )
+        return register_statement(f"{self.name}[{mask:x}]", sql, prepare=False)
+
+    def _compile_fallback(self) -> Statement:
+        set_clauses = [f"{column} = COALESCE(${index}, {column})" for index, column in enumerate(self.columns, start=1)]
+        sql = (
+            f"UPDATE {self.table} SET {', '.join(set_clauses)}, updated_at = CURRENT_TIMESTAMP "
+            f"WHERE {self.key_column} = ${len(self.columns) + 1} RETURNING {self.returning}"
+        )
+        return register_statement(f"{self.name}[all]", sql)
+
+    def build(self, fields: Dict[str, Any], key: Any) -> Tuple[Statement, List[Any]]:
+        """Return the statement and its arguments for updating `fields` on the row matching `key`."""
+        unknown = [column for column in fields if column not in self._bits]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Cannot update fields: {', '.join(unknown)}.")
+        if not fields:
+            raise HTTPException(status_code=400, detail="No fields provided to update.")
+
+        mask = 0
+        for column in fields:
+            mask |= self._bits[column]
+
+        statement = self._compiled.get(mask)
+        if statement is None and len(self._compiled) < self.max_statements:
+            statement = self._compiled[mask] = self._compile(mask)
+        if statement is None:
+            if self._fallback is None:
+                self._fallback = self._compile_fallback()
+            return self._fallback, [fields.get(column) for column in self.columns] + [key]
+
+        return statement, [fields[column] for column in self.columns if column in fields] + [key]
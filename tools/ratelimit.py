@@ -0,0 +1,208 @@
+import math
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+from tools import metrics
+from tools.status_code import status_code
+from tools.constant import (
+    RATE_LIMIT_BACKEND,
+    RATE_LIMIT_MAX_KEYS,
+    REDIS_URL,
+    LOGIN_RATE_LIMIT_WINDOW,
+    LOGIN_RATE_LIMIT_PER_USERNAME,
+    LOGIN_RATE_LIMIT_PER_IP,
+)
+
+
+class InMemoryRateLimitStore:
+    """
+    Per-key counters of the current and previous fixed window, local to this worker process.
+    Bounded LRU: the least recently seen keys are evicted first, which can only make a limit more lenient.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        # key -> [window index, hits in that window, hits in the window before]
+        self._windows: "OrderedDict[str, list]" = OrderedDict()
+        self.evictions = 0
+
+    async def incr(self, key: str, window: int, ttl: int) -> Tuple[int, int]:
+        """Count a hit of `key` in window number `window`; returns the (current, previous) counts after it."""
+        entry = self._windows.get(key)
+        if entry is None or entry[0] < window - 1:
+            entry = [window, 0, 0]
+        elif entry[0] == window - 1:
+            entry = [window, 0, entry[1]]
+        entry[1] += 1
+        self._windows[key] = entry
+        self._windows.move_to_end(key)
+        while len(self._windows) > self.max_keys:
+            self._windows.popitem(last=False)
+            self.evictions += 1
+        return entry[1], entry[2]
+
+    async def decr(self, key: str, window: int, ttl: int) -> None:
+        """Take back one hit counted in window number `window`."""
+        entry = self._windows.get(key)
+        if entry is not None:
+            if entry[0] == window and entry[1] > 0:
+                entry[1] -= 1
+            elif entry[0] == window + 1 and entry[2] > 0:
+                entry[2] -= 1
+
+    async def reset(self, key: str, window: int) -> None:
+        self._windows.pop(key, None)
+
+
+class RedisRateLimitStore:
+    """
+    Shared counters in a Redis-compatible asyncio client, one key per fixed window so every
+    worker and host sees the same attempts; keys expire on their own after two windows.
+    INCR is atomic, so concurrent attempts on any worker each see a distinct count.
+    """
+
+    def __init__(self, client, prefix: str = "ratelimit"):
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, key: str, window: int) -> str:
+        return f"{self.prefix}:{key}:{window}"
+
+    async def incr(self, key: str, window: int, ttl: int) -> Tuple[int, int]:
+        redis_key = self._key(key, window)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.incr(redis_key)
+            pipe.expire(redis_key, ttl)
+            pipe.get(self._key(key, window - 1))
+            current, _, previous = await pipe.execute()
+        return int(current), int(previous or 0)
+
+    async def decr(self, key: str, window: int, ttl: int) -> None:
+        redis_key = self._key(key, window)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.decr(redis_key)
+            pipe.expire(redis_key, ttl)
+            await pipe.execute()
+
+    async def reset(self, key: str, window: int) -> None:
+        await self.client.delete(self._key(key, window), self._key(key, window - 1))
+
+
+def create_rate_limit_store():
+    """Build the store selected by RATE_LIMIT_BACKEND."""
+    if RATE_LIMIT_BACKEND == "redis":
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package to be installed.")
+        return RedisRateLimitStore(redis.from_url(REDIS_URL))
+    return InMemoryRateLimitStore()
+
+
+class SlidingWindowLimiter:
+    """
+    Sliding-window counter: the previous window's hits are weighted by how much of it still
+    overlaps the sliding window, so the estimate is smooth with O(1) state per key.
+    A limit of 0 disables the limiter.
+    """
+
+    def __init__(self, name: str, limit: int, window: int, store=None):
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self.store = store if store is not None else create_rate_limit_store()
+
+    def _position(self, now: float) -> Tuple[int, float]:
+        return int(now // self.window), now % self.window
+
+    def _retry_after(self, current: int, previous: int, elapsed: float) -> int:
+        """Seconds until one more hit fits: previous * (1 - t / window) + current + 1 <= limit."""
+        room = self.limit - 1  # Counted hits that may remain when the next attempt arrives
+        if current > room:
+            # Blocked by this window alone: wait for it to end, then for its weight to fade (current >= limit > 0)
+            wait = (self.window - elapsed) + self.window * (1 - room / current)
+        else:
+            # Blocked only by the previous window's weight, so previous > 0
+            wait = self.window * (1 - (room - current) / previous) - elapsed
+        return max(1, math.ceil(wait))
+
+    async def acquire(self, key: str, now: Optional[float] = None) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Count an attempt for `key` and decide on the counts the store returned, so concurrent
+        attempts cannot all slip under the limit. Returns (window, None) when allowed, pass the
+        window to release() to take the attempt back; (None, seconds to wait) when over the limit,
+        in which case the attempt is not counted, so backing off always ends the block.
+        """
+        if self.limit <= 0:
+            return None, None
+        now = time.time() if now is None else now
+        window, elapsed = self._position(now)
+        store_key = f"{self.name}:{key}"
+        current, previous = await self.store.incr(store_key, window, ttl=2 * self.window)
+        if previous * (1 - elapsed / self.window) + current > self.limit:
+            await self.store.decr(store_key, window, ttl=2 * self.window)
+            return None, self._retry_after(current - 1, previous, elapsed)
+        return window, None
+
+    async def release(self, key: str, window: Optional[int]) -> None:
+        """Take back an attempt acquired in `window`."""
+        if window is not None:
+            await self.store.decr(f"{self.name}:{key}", window, ttl=2 * self.window)
+
+    async def reset(self, key: str) -> None:
+        window, _ = self._position(time.time())
+        await self.store.reset(f"{self.name}:{key}", window)
+
+
+login_rate_limited_total = metrics.Counter(
+    "login_rate_limited_total", "Login attempts rejected with 429, by limiter.", ("limiter",)
+)
+
+# Login attempts per username (slows guessing one account) and failed attempts per client IP
+# (slows credential stuffing without throttling many users logging in from behind one NAT)
+_login_store = create_rate_limit_store()
+login_username_limiter = SlidingWindowLimiter("login:user", LOGIN_RATE_LIMIT_PER_USERNAME, LOGIN_RATE_LIMIT_WINDOW, _login_store)
+login_ip_limiter = SlidingWindowLimiter("login:ip", LOGIN_RATE_LIMIT_PER_IP, LOGIN_RATE_LIMIT_WINDOW, _login_store)
+
+# (limiter, key, window) of every attempt counted for one login request
+LoginAttempt = List[Tuple[SlidingWindowLimiter, str, Optional[int]]]
+
+
+async def enforce_login_rate_limit(username: str, client_ip: Optional[str]) -> LoginAttempt:
+    """
+    Count the attempt against both limits, or raise 429 with Retry-After when either is exhausted.
+    Call before any lookup or bcrypt work; pass the result to reset_login_rate_limit() on success.
+    """
+    checks = [(login_username_limiter, username.strip().lower())]
+    if client_ip:
+        checks.append((login_ip_limiter, client_ip))
+
+    attempt: LoginAttempt = []
+    for limiter, key in checks:
+        window, retry_after = await limiter.acquire(key)
+        if retry_after is not None:
+            # Give back what the other limiters already counted for this rejected attempt
+            for counted, counted_key, counted_window in attempt:
+                await counted.release(counted_key, counted_window)
+            login_rate_limited_total.inc(limiter.name)
+            raise HTTPException(
+                status_code=429,
+                detail=f"{status_code(429)}. Too many login attempts, retry in {retry_after} seconds.",
+                headers={"Retry-After": str(retry_after)},
+            )
+        attempt.append((limiter, key, window))
+    return attempt
+
+
+async def reset_login_rate_limit(attempt: LoginAttempt) -> None:
+    """
+    After a successful login: forget the failed attempts of the account, and take this
+    attempt back from the client IP, so the IP limit only ever counts failures.
+    """
+    for limiter, key, window in attempt:
+        if limiter is login_username_limiter:
+            await limiter.reset(key)
+        else:
+            await limiter.release(key, window)
@@ -0,0 +1,188 @@
+import asyncio
+import contextlib
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+import asyncpg
+from fastapi import HTTPException
+from tools import metrics
+from tools import statements
+from tools.database import connection
+from tools.constant import REVOCATION_BACKEND, REVOCATION_COMPACT_INTERVAL, REVOCATION_SYNC_INTERVAL
+from tools.statements import register_statement
+
+logger = logging.getLogger(__name__)
+
+# Shared denylist of refresh-token ids (see migrations/0003_revoked_tokens.sql); timestamps are naive UTC
+REVOKED_TOKEN_INSERT = register_statement("revoked_token.insert", """
+    INSERT INTO revoked_tokens (jti, expires_at) VALUES ($1, $2)
+    ON CONFLICT (jti) DO NOTHING
+    RETURNING jti
+""")
+REVOKED_TOKENS_SINCE = register_statement("revoked_token.since", """
+    SELECT jti, expires_at, revoked_at FROM revoked_tokens
+    WHERE revoked_at > $1 AND expires_at > (now() AT TIME ZONE 'utc')
+""")
+REVOKED_TOKENS_PURGE = register_statement(
+    "revoked_token.purge", "DELETE FROM revoked_tokens WHERE expires_at <= (now() AT TIME ZONE 'utc')"
+)
+
+# Rows committed slightly out of revoked_at order are picked up by re-reading this far back
+SYNC_OVERLAP_SECONDS = 30
+
+
+class InMemoryRevocationStore:
+    """
+    Token ids (jti) revoked until their own expiry, local to this worker process.
+    Lookups are a single dict probe; expired ids are dropped by periodic compaction.
+    """
+
+    def __init__(self, compact_interval: float = REVOCATION_COMPACT_INTERVAL):
+        self.compact_interval = compact_interval
+        self._revoked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._next_compaction = time.time() + compact_interval
+        self.compactions = 0
+
+    def is_revoked(self, jti: str) -> bool:
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def _add(self, jti: str, expires_at: float) -> bool:
+        """Record the id; False when it was already revoked (and not yet expired)."""
+        now = time.time()
+        with self._lock:
+            if now >= self._next_compaction:
+                self._compact(now)
+            current = self._revoked.get(jti)
+            if current is not None and current > now:
+                return False
+            self._revoked[jti] = expires_at
+            return True
+
+    def _compact(self, now: float) -> int:
+        before = len(self._revoked)
+        self._revoked = {jti: expires_at for jti, expires_at in self._revoked.items() if expires_at > now}
+        self._next_compaction = now + self.compact_interval
+        self.compactions += 1
+        return before - len(self._revoked)
+
+    def compact(self) -> int:
+        """Drop ids whose tokens have expired anyway; returns how many were removed."""
+        with self._lock:
+            return self._compact(time.time())
+
+    async def revoke(self, jti: str, expires_at: float) -> None:
+        self._add(jti, expires_at)
+
+    async def consume(self, jti: str, expires_at: float) -> bool:
+        """
+        Revoke a token id as part of using it (refresh-token rotation).
+        Returns False when the id was already revoked, i.e. the token is being replayed.
+        """
+        return self._add(jti, expires_at)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def stats(self) -> Dict:
+        return {"backend": "memory", "size": len(self._revoked), "compactions": self.compactions}
+
+
+class PostgresRevocationStore(InMemoryRevocationStore):
+    """
+    Revocations shared by every worker through the revoked_tokens table.
+
+    Writes go to the table first, so consume() is atomic across workers. Reads stay in memory:
+    a background task copies rows revoked elsewhere every `sync_interval` seconds, so
+    is_revoked() never waits on the database.
+    """
+
+    def __init__(self, compact_interval: float = REVOCATION_COMPACT_INTERVAL,
+                 sync_interval: float = REVOCATION_SYNC_INTERVAL):
+        super().__init__(compact_interval)
+        self.sync_interval = sync_interval
+        self._synced_until = datetime.fromtimestamp(0, tz=timezone.utc).replace(tzinfo=None)
+        self._sync_task: Optional[asyncio.Task] = None
+        self._next_purge = time.time() + compact_interval
+
+    async def _insert(self, jti: str, expires_at: float) -> bool:
+        async with connection() as db:
+            inserted = await statements.fetchval(
+                db, REVOKED_TOKEN_INSERT, jti,
+                datetime.fromtimestamp(expires_at, tz=timezone.utc).replace(tzinfo=None),
+            )
+        self._add(jti, expires_at)
+        return inserted is not None
+
+    async def revoke(self, jti: str, expires_at: float) -> None:
+        await self._insert(jti, expires_at)
+
+    async def consume(self, jti: str, expires_at: float) -> bool:
+        if self.is_revoked(jti):
+            return False
+        return await self._insert(jti, expires_at)
+
+    async def sync(self) -> None:
+        """Copy revocations made by other workers since the last sync."""
+        async with connection() as db:
+            if time.time() >= self._next_purge:
+                await statements.fetch(db, REVOKED_TOKENS_PURGE)
+                self._next_purge = time.time() + self.compact_interval
+            rows = await statements.fetch(
+                db, REVOKED_TOKENS_SINCE, self._synced_until - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+            )
+        for row in rows:
+            self._add(row["jti"], row["expires_at"].replace(tzinfo=timezone.utc).timestamp())
+            self._synced_until = max(self._synced_until, row["revoked_at"])
+
+    async def _sync_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except (asyncpg.PostgresError, OSError, HTTPException) as e:
+                logger.warning("Could not sync revoked tokens: %s", e)
+
+    async def start(self) -> None:
+        try:
+            await self.sync()
+        except asyncpg.UndefinedTableError:
+            raise RuntimeError(
+                "REVOCATION_BACKEND=postgres needs the revoked_tokens table: run `python migrate.py` "
+                "(migration 0003), or set REVOCATION_BACKEND=memory for a single worker."
+            ) from None
+        self._sync_task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self) -> None:
+        # Wait for the task to finish cancelling, so no sync still runs once the pool is closed
+        task, self._sync_task = self._sync_task, None
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    def stats(self) -> Dict:
+        return dict(super().stats(), backend="postgres", synced_until=self._synced_until.isoformat())
+
+
+def create_revocation_store() -> InMemoryRevocationStore:
+    """Build the store selected by REVOCATION_BACKEND."""
+    if REVOCATION_BACKEND == "postgres":
+        return PostgresRevocationStore()
+    return InMemoryRevocationStore()
+
+
+# Revoked refresh-token ids: rotated-out tokens and logouts
+refresh_token_revocations = create_revocation_store()
+
+metrics.Gauge(
+    "revoked_refresh_tokens", "Refresh-token ids held in the revocation store.",
+    lambda: {(): len(refresh_token_revocations._revoked)},
+)
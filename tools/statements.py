@@ -0,0 +1,145 @@
+import inspect
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+import asyncpg
+from tools import metrics
+
+logger = logging.getLogger(__name__)
+
+# prepare_statements() fills asyncpg's per-connection statement cache through the private
+# Connection._prepare(query, use_cache=True) (asyncpg is pinned in requirements.txt for this).
+# If an upgrade changes it, say so loudly and prepare on first use instead, as asyncpg does anyway.
+_CAN_PREPARE_CACHED = "use_cache" in inspect.signature(
+    getattr(asyncpg.connection.Connection, "_prepare", lambda: None)
+).parameters
+if not _CAN_PREPARE_CACHED:
+    logger.warning(
+        "asyncpg %s has no Connection._prepare(..., use_cache=...): statements are no longer prepared "
+        "on connect; update tools.statements.prepare_statements for this asyncpg version.",
+        asyncpg.__version__,
+    )
+
+
+class Statement:
+    """A named SQL statement with execution counters."""
+
+    __slots__ = ("name", "sql", "prepare", "calls", "rows", "total_seconds", "max_seconds")
+
+    def __init__(self, name: str, sql: str, prepare: bool = False):
+        self.name = name
+        self.sql = sql
+        self.prepare = prepare
+        self.calls = 0
+        self.rows = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, elapsed: float, rows: int) -> None:
+        self.calls += 1
+        self.rows += rows
+        self.total_seconds += elapsed
+        if elapsed > self.max_seconds:
+            self.max_seconds = elapsed
+
+    def stats(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "rows": self.rows,
+            "total_ms": self.total_seconds * 1000,
+            "avg_ms": (self.total_seconds / self.calls * 1000) if self.calls else 0.0,
+            "max_ms": self.max_seconds * 1000,
+        }
+
+
+# Every named statement of the database layer; those with prepare=True are prepared on each pooled connection
+_registry: Dict[str, Statement] = {}
+
+
+def adhoc_statement(name: str, sql: str) -> Statement:
+    """
+    A statement that is timed under `name` like registered ones but not prepared on connect,
+    for SQL assembled per request (listing shapes, bulk loads).
+    """
+    return Statement(name, sql)
+
+
+def register_statement(name: str, sql: str, prepare: bool = True) -> Statement:
+    """
+    Register a statement once; registering the same name again returns the existing one.
+    Pass prepare=False for one of many generated shapes of a query: it is prepared on first use
+    on each connection instead of on every new connection.
+    """
+    statement = _registry.get(name)
+    if statement is None:
+        statement = _registry[name] = Statement(name, sql, prepare)
+    elif statement.sql != sql:
+        raise ValueError(f"Statement '{name}' is already registered with different SQL.")
+    return statement
+
+
+# Hot-path statements with representative arguments, EXPLAINed by `python migrate.py explain`
+_hot_queries: Dict[str, Tuple[Statement, tuple]] = {}
+
+
+def hot_query(statement: Statement, *args) -> Statement:
+    """Mark a statement as hot-path: `migrate.py explain` checks that an index can serve it with `args`."""
+    _hot_queries[statement.name] = (statement, args)
+    return statement
+
+
+def hot_queries() -> Dict[str, Tuple[Statement, tuple]]:
+    """Every statement marked with hot_query(), by name; import the database layer first."""
+    return dict(_hot_queries)
+
+
+async def prepare_statements(db: asyncpg.Connection) -> None:
+    """
+    Pool init hook: parse every registered statement marked prepare=True once on a new connection.
+
+    Statements go into the connection's own statement cache, which outlives pool
+    releases (PreparedStatement objects do not), so later fetch/fetchrow calls with
+    the same SQL skip parsing and planning.
+    """
+    if not _CAN_PREPARE_CACHED:
+        return
+    for statement in list(_registry.values()):
+        if not statement.prepare:
+            continue
+        try:
+            await db._prepare(statement.sql, use_cache=True)
+        except asyncpg.PostgresError as e:
+            # A missing table must not stop the pool from starting; the statement is prepared on first use
+            logger.warning("Could not prepare statement %s: %s", statement.name, e)
+
+
+async def _run(db, statement: Statement, method: str, args):
+    started = time.perf_counter()
+    result = await getattr(db, method)(statement.sql, *args)
+
+    if method == "fetch":
+        rows = len(result)
+    else:
+        rows = 0 if result is None else 1
+    elapsed = time.perf_counter() - started
+    statement.record(elapsed, rows)
+    metrics.observe_query(statement.name, statement.sql, elapsed, rows)
+    return result
+
+
+async def fetch(db, statement: Statement, *args) -> List[asyncpg.Record]:
+    return await _run(db, statement, "fetch", args)
+
+
+async def fetchrow(db, statement: Statement, *args) -> Optional[asyncpg.Record]:
+    return await _run(db, statement, "fetchrow", args)
+
+
+async def fetchval(db, statement: Statement, *args):
+    return await _run(db, statement, "fetchval", args)
+
+
+def statement_stats() -> Dict[str, Dict]:
+    """Execution count and latency of every registered statement."""
+    return {name: statement.stats() for name, statement in _registry.items()}
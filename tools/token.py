@@ -1,28 +1,149 @@
+import asyncio
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
 from jose import jwt, JWTError
 from datetime import datetime, timedelta, timezone  # Add timezone import
-from passlib.context import CryptContext
-from typing import Optional, Union, Dict
-from fastapi import FastAPI, HTTPException, Header
+from typing import Any, Callable, Optional, Union, Dict, List
+from fastapi import HTTPException, Header
 from tools.constant import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
     REFRESH_TOKEN_EXPIRE_MINUTES,
     JWT_SECRET_KEY,
     JWT_REFRESH_SECRET_KEY,
     ALGORITHM,
+    REFRESH_TOKEN_ALGORITHM,
+    TOKEN_CACHE_MAX_SIZE,
+    PASSWORD_HASH_EXECUTOR,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_MAX_CONCURRENCY,
+    PASSWORD_HASH_MAX_QUEUE,
 )
+from tools import metrics
+from tools.revocation import refresh_token_revocations
+from tools.keys import get_key_set, is_asymmetric
 
-app = FastAPI()
+# passlib is only imported by the first hash or verify (in process-pool mode, once per hashing process)
+_pwd_context = None
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def _get_pwd_context():
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
 
 # Password hashing and verification
 def get_password_hash(password: str) -> str:
     """Hash the password using bcrypt algorithm."""
-    return pwd_context.hash(password)
+    return _get_pwd_context().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify the plain password against the stored hashed password."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return _get_pwd_context().verify(plain_password, hashed_password)
+
+# Async password hashing on a bounded worker pool, so bcrypt never blocks the event loop
+_hash_executor: Optional[Executor] = None
+_hash_semaphore: Optional[asyncio.Semaphore] = None
+_hash_stats = {"queued": 0, "running": 0, "completed": 0, "rejected": 0, "max_queued": 0, "busy_seconds": 0.0}
+
+def _get_hash_executor() -> Executor:
+    global _hash_executor
+    if _hash_executor is None:
+        if PASSWORD_HASH_EXECUTOR == "process":
+            # Imported here: multiprocessing costs tens of milliseconds at startup in thread mode
+            from concurrent.futures import ProcessPoolExecutor
+            _hash_executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+        else:
+            _hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+    return _hash_executor
+
+def _get_hash_semaphore() -> asyncio.Semaphore:
+    global _hash_semaphore
+    if _hash_semaphore is None:
+        _hash_semaphore = asyncio.Semaphore(PASSWORD_HASH_MAX_CONCURRENCY)
+    return _hash_semaphore
+
+async def _run_password_hashing(func, *args):
+    if PASSWORD_HASH_MAX_QUEUE and _hash_stats["queued"] >= PASSWORD_HASH_MAX_QUEUE:
+        _hash_stats["rejected"] += 1
+        raise HTTPException(status_code=503, detail="Too many concurrent logins. Please retry.", headers={"Retry-After": "1"})
+
+    _hash_stats["queued"] += 1
+    _hash_stats["max_queued"] = max(_hash_stats["max_queued"], _hash_stats["queued"])
+    queued = True
+    try:
+        async with _get_hash_semaphore():
+            _hash_stats["queued"] -= 1
+            queued = False
+            _hash_stats["running"] += 1
+            started = time.perf_counter()
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(_get_hash_executor(), func, *args)
+            finally:
+                elapsed = time.perf_counter() - started
+                _hash_stats["running"] -= 1
+                _hash_stats["completed"] += 1
+                _hash_stats["busy_seconds"] += elapsed
+                metrics.password_hash_duration_seconds.observe(elapsed, func.__name__)
+    finally:
+        if queued:
+            _hash_stats["queued"] -= 1
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash the password on the password-hash worker pool."""
+    return await _run_password_hashing(get_password_hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify the password on the password-hash worker pool."""
+    return await _run_password_hashing(verify_password, plain_password, hashed_password)
+
+async def get_password_hashes_async(passwords: List[str]) -> List[str]:
+    """
+    Hash many passwords in parallel for bulk imports.
+    Submits one window of PASSWORD_HASH_MAX_CONCURRENCY at a time so logins keep their turn in the queue.
+    """
+    hashes = []
+    for start in range(0, len(passwords), PASSWORD_HASH_MAX_CONCURRENCY):
+        window = passwords[start:start + PASSWORD_HASH_MAX_CONCURRENCY]
+        hashes.extend(await asyncio.gather(*(_run_password_hashing(get_password_hash, password) for password in window)))
+    return hashes
+
+def password_hash_stats() -> Dict:
+    """Queue depth and throughput counters of the password-hash worker pool."""
+    return dict(_hash_stats, executor=PASSWORD_HASH_EXECUTOR, workers=PASSWORD_HASH_WORKERS,
+                max_concurrency=PASSWORD_HASH_MAX_CONCURRENCY)
+
+metrics.Gauge("password_hash_queued", "Password hashes waiting for a worker.", lambda: {(): _hash_stats["queued"]})
+metrics.Gauge("password_hash_running", "Password hashes running on the worker pool.", lambda: {(): _hash_stats["running"]})
+
+def shutdown_password_hasher() -> None:
+    """Stop the password-hash worker pool (called on application shutdown)."""
+    global _hash_executor, _hash_semaphore
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+    _hash_semaphore = None
+
+# Access-token keys: the HMAC secret, or with RS256/ES256 the active private key (named by
+# a kid header) for signing and the public key of the token's kid for verification
+def _access_signing_key():
+    if is_asymmetric():
+        kid, key = get_key_set().signing_key()
+        return key, {"kid": kid}
+    return JWT_SECRET_KEY, None
+
+def access_verification_key(token: str):
+    if not is_asymmetric():
+        return JWT_SECRET_KEY
+    key = get_key_set().public_key(jwt.get_unverified_header(token).get("kid"))
+    if key is None:
+        raise JWTError("Unknown signing key.")
+    return key
 
 # Token creation
 def create_access_token(data: dict) -> str:
@@ -30,7 +151,11 @@ def create_access_token(data: dict) -> str:
         to_encode = data.copy()
         expire = datetime.now(tz=timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)  # Use timezone.utc
         to_encode.update({"exp": expire})
-        return jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=ALGORITHM)
+        key, headers = _access_signing_key()
+        started = time.perf_counter()
+        encoded_jwt = jwt.encode(to_encode, key, algorithm=ALGORITHM, headers=headers)
+        metrics.jwt_duration_seconds.observe(time.perf_counter() - started, "access", "encode")
+        return encoded_jwt
     except Exception as e:
         print("Error in create_access_token:", str(e))
         raise HTTPException(status_code=500, detail="Failed to create access token.")
@@ -38,33 +163,187 @@ def create_access_token(data: dict) -> str:
 def create_refresh_token(data: dict) -> str:
     """
     Generate a refresh token with a longer expiration time.
+    Its unique `jti` lets one token be rotated out or revoked (see tools.revocation).
     """
     to_encode = data.copy()
     expire = datetime.now(tz=timezone.utc) + timedelta(minutes=REFRESH_TOKEN_EXPIRE_MINUTES)  # Use timezone.utc
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, JWT_REFRESH_SECRET_KEY, algorithm=ALGORITHM)
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
+    started = time.perf_counter()
+    encoded_jwt = jwt.encode(to_encode, JWT_REFRESH_SECRET_KEY, algorithm=REFRESH_TOKEN_ALGORITHM)
+    metrics.jwt_duration_seconds.observe(time.perf_counter() - started, "refresh", "encode")
     return encoded_jwt
 
+# Verified-token cache
+class VerifiedTokenCache:
+    """
+    Bounded LRU of already-verified token payloads, keyed by a SHA-256 digest of the token.
+    Entries drop out at the token's exp claim or when the cache is full.
+
+    Revoked digests cannot be evicted early without un-revoking them. Each is kept only until its
+    token expires, at most ACCESS_TOKEN_EXPIRE_MINUTES ahead (see revoke_token), so the denylist
+    holds at most the logouts of one token lifetime: about 140 bytes each, 1.4 MB per 10,000.
+    """
+
+    def __init__(self, name: str, max_size: int = TOKEN_CACHE_MAX_SIZE):
+        self.name = name
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, tuple[float, Dict]]" = OrderedDict()
+        self._revoked: Dict[bytes, float] = {}
+        self._revoked_compact_at = max_size
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, key: bytes) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, payload = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key: bytes, payload: Dict) -> None:
+        expires_at = payload.get("exp")
+        if not isinstance(expires_at, (int, float)):
+            return  # Never cache a token that does not expire
+        with self._lock:
+            self._entries[key] = (float(expires_at), payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def revoke(self, key: bytes, expires_at: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._entries.pop(key, None)
+            self._revoked[key] = expires_at
+            # Drop tokens that have expired anyway; the next pass waits until the denylist doubles,
+            # so a burst of logouts costs amortized O(1) per revocation rather than a scan each
+            if len(self._revoked) > self._revoked_compact_at:
+                self._revoked = {k: exp for k, exp in self._revoked.items() if exp > now}
+                self._revoked_compact_at = max(self.max_size, 2 * len(self._revoked))
+
+    def is_revoked(self, key: bytes) -> bool:
+        expires_at = self._revoked.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            with self._lock:
+                self._revoked.pop(key, None)
+            return False
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._revoked.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "revoked": len(self._revoked),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+access_token_cache = VerifiedTokenCache("access")
+refresh_token_cache = VerifiedTokenCache("refresh")
+
+
+def _decode_cached(cache: VerifiedTokenCache, token: str, resolve_key: Callable[[str], Any], algorithm: str,
+                   error_detail: str) -> Dict:
+    key = VerifiedTokenCache.digest(token)
+    if cache.is_revoked(key):
+        raise HTTPException(status_code=401, detail=error_detail)
+
+    payload = cache.get(key)
+    if payload is None:
+        started = time.perf_counter()
+        try:
+            payload = jwt.decode(token, resolve_key(token), algorithms=[algorithm])
+        except JWTError:
+            raise HTTPException(status_code=401, detail=error_detail)
+        finally:
+            metrics.jwt_duration_seconds.observe(time.perf_counter() - started, cache.name, "decode")
+        cache.put(key, payload)
+
+    # Hand out a copy so callers cannot mutate the cached payload
+    return dict(payload)
+
+
+def revoke_token(token: str) -> None:
+    """
+    Revoke an access token immediately; it stays denied until its own expiry.
+    Refresh tokens are revoked by jti through tools.revocation instead.
+    """
+    try:
+        expires_at = jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        return  # Not a JWT, so it can never validate anyway
+    # No access token outlives this, which bounds how long the denial has to be kept
+    latest = time.time() + ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    if not isinstance(expires_at, (int, float)) or expires_at > latest:
+        expires_at = latest
+
+    access_token_cache.revoke(VerifiedTokenCache.digest(token), expires_at)
+
+
+def token_cache_stats() -> Dict:
+    return {
+        "access": access_token_cache.stats(),
+        "refresh": refresh_token_cache.stats(),
+    }
+
+
+metrics.Gauge(
+    "token_cache_entries", "Verified tokens held in memory.",
+    lambda: {(cache.name,): len(cache._entries) for cache in (access_token_cache, refresh_token_cache)},
+    ("token",),
+)
+metrics.Gauge("access_token_denylist_entries", "Logged-out access tokens denied until they expire.",
+              lambda: {(): len(access_token_cache._revoked)})
+
+
 # Token validation
 def validate_access_token(token: str) -> Union[Dict, None]:
     """
     Validate and decode an access token.
     """
-    try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid or expired access token.")
+    return _decode_cached(access_token_cache, token, access_verification_key, ALGORITHM, "Invalid or expired access token.")
 
 def validate_refresh_token(token: str) -> Union[Dict, None]:
     """
     Validate and decode a refresh token.
+    Tokens without a jti (issued before rotation) or with a revoked one are rejected;
+    the revocation check is an in-memory lookup, never a database round trip.
     """
-    try:
-        payload = jwt.decode(token, JWT_REFRESH_SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except JWTError:
+    payload = _decode_cached(
+        refresh_token_cache, token, lambda _: JWT_REFRESH_SECRET_KEY, REFRESH_TOKEN_ALGORITHM,
+        "Invalid or expired refresh token.",
+    )
+    jti = payload.get("jti")
+    if not jti or refresh_token_revocations.is_revoked(jti):
         raise HTTPException(status_code=401, detail="Invalid or expired refresh token.")
+    return payload
 
 # Extract Bearer token
 def get_bearer_token(authorization: Optional[str] = Header(None)) -> str: